@@ -87,11 +87,14 @@ def reset_session(cfg: Any) -> None:
 
 def _session_key(cfg: Any) -> str:
     config_path = os.environ.get("AGENT_CONFIG_PATH", "")
-    cwd = os.getcwd()
+    try:
+        from .tools import current_run_dir
+    except ImportError:
+        from agent_scaffold.tools import current_run_dir
     return json.dumps(
         {
             "config_path": config_path,
-            "cwd": cwd,
+            "cwd": str(current_run_dir()),
             "suite": getattr(cfg, "suite", ""),
             "benchmark_version": getattr(cfg, "benchmark_version", ""),
             "user_task": getattr(cfg, "user_task", ""),
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
+import functools
+import hashlib
 import importlib
+import json
 import os
 import re
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Any
 
-import yaml
 
-
-@dataclass
+@dataclass(slots=True)
 class LLMConfig:
     provider: str
     model: str
@@ -18,23 +19,24 @@ class LLMConfig:
     base_url: str = ""
     api_key: str = ""
     request_timeout: int | None = 120
+    cache_responses: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolConfig:
     name: str
     import_path: str
     description: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentConfig:
     name: str
     system_prompt: str
     task: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class GraphConfig:
     type: str
     max_iters: int = 4
@@ -43,22 +45,24 @@ class GraphConfig:
     react_prompt: str = ""
     react_max_iterations: int | None = 15
     react_max_execution_time: int | None = 120
+    max_tool_payload_chars: int | None = 1_000_000
 
 
-@dataclass
+@dataclass(slots=True)
 class MonitoringConfig:
     enabled: bool = False
     output_path: str = "trace.json"
     print_trace: bool = False
+    record_usage: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class SkillsConfig:
     enabled: list[Any] = field(default_factory=list)
     base_dir: str = "skills"
 
 
-@dataclass
+@dataclass(slots=True)
 class PlannerConfig:
     enabled: bool = False
     type: str = "static"
@@ -66,18 +70,18 @@ class PlannerConfig:
     steps: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class MiddlewareConfig:
     enabled: bool = True
     modules: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class SecurityConfig:
     trusted_tool_output_prompt: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class AegisConfig:
     enabled: bool = False
     mode: str = "block"
@@ -87,7 +91,7 @@ class AegisConfig:
     block_tools: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Pro2GuardConfig:
     enabled: bool = False
     mode: str = "block"
@@ -102,7 +106,7 @@ class Pro2GuardConfig:
     fail_closed: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentDojoConfig:
     enabled: bool = False
     suite: str = "workspace"
@@ -117,7 +121,7 @@ class AgentDojoConfig:
     injections: dict[str, str] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class ContainerConfig:
     enabled: bool = True
     image: str = "agent-scaffold:latest"
@@ -138,7 +142,7 @@ class ContainerConfig:
     )
 
 
-@dataclass
+@dataclass(slots=True)
 class AppConfig:
     llm: LLMConfig
     agent: AgentConfig
@@ -200,8 +204,26 @@ def _parse_agentdojo_case(case_id: str) -> tuple[str, str]:
     return user_task, injection_task
 
 
+@functools.lru_cache(maxsize=1)
+def _yaml_loader() -> Any:
+    # PyYAML is imported on first use so that importing this module stays cheap.
+    try:
+        from yaml import CSafeLoader as loader
+    except ImportError:  # pragma: no cover - libyaml not available
+        from yaml import SafeLoader as loader  # type: ignore[assignment]
+    return loader
+
+
+def _load_yaml(path: Path) -> Any:
+    import yaml
+
+    # Hand the binary handle to the loader so libyaml decodes and buffers it itself.
+    with open(path, "rb") as fh:
+        return yaml.load(fh, Loader=_yaml_loader())
+
+
 def _load_yaml_mapping(path: Path) -> dict[str, Any]:
-    raw = yaml.safe_load(path.read_text(encoding="utf-8"))
+    raw = _load_yaml(path)
     if raw is None:
         return {}
     if not isinstance(raw, dict):
@@ -231,7 +253,7 @@ def _resolve_harness_dir(config_path: Path, raw: dict[str, Any]) -> Path | None:
 
 
 def _coerce_yaml_list(path: Path, key: str) -> list[Any]:
-    loaded = yaml.safe_load(path.read_text(encoding="utf-8"))
+    loaded = _load_yaml(path)
     if loaded is None:
         return []
     if isinstance(loaded, list):
@@ -320,15 +342,286 @@ def _apply_harness_files(raw: dict[str, Any], harness_dir: Path | None) -> dict[
 
 def load_config_mapping(path: str | Path) -> dict[str, Any]:
     config_path = Path(path).resolve()
-    raw = yaml.safe_load(config_path.read_text(encoding="utf-8"))
+    raw = _load_yaml(config_path)
     if not isinstance(raw, dict):
         raise ValueError("Config root must be a mapping")
     return _apply_harness_files(raw, _resolve_harness_dir(config_path, raw))
 
 
+_PLAIN_KEY_RE = re.compile(r"[A-Za-z_][\w.-]*")
+
+
+def _load_yaml_sections(path: Path, keys: tuple[str, ...]) -> dict[str, Any]:
+    import yaml
+
+    # Collect only the requested top-level blocks and stop once all of them were read.
+    lines: list[str] = []
+    seen: set[str] = set()
+    capture = False
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line[:1] not in ("", " ", "\t", "\r", "\n", "#", "-"):
+                if seen.issuperset(keys):
+                    break
+                key = line.split(":", 1)[0].strip()
+                if not _PLAIN_KEY_RE.fullmatch(key):
+                    # Quoted or complex keys, anchors, flow mappings, directives: let YAML decide.
+                    return _load_yaml_mapping(path)
+                capture = key in keys
+                if capture:
+                    seen.add(key)
+            if capture:
+                lines.append(line)
+    try:
+        raw = yaml.load("".join(lines), Loader=_yaml_loader()) if lines else None
+    except yaml.YAMLError:
+        # A block can refer to anchors defined outside the lines that were kept.
+        return _load_yaml_mapping(path)
+    return raw if isinstance(raw, dict) else {}
+
+
+def load_config_header(path: str | Path) -> dict[str, str]:
+    """Return llm.provider and graph.type without loading the full config.
+
+    Only the llm/graph/harness blocks of the config and of the harness
+    environment.yaml are parsed, which is enough to decide which runtime stack
+    a run needs. Files whose top level the block scan cannot follow are parsed
+    in full instead.
+    """
+    config_path = Path(path).resolve()
+    raw = _load_yaml_sections(config_path, ("harness", "llm", "graph"))
+    harness_dir = _resolve_harness_dir(config_path, raw)
+    if harness_dir is not None and (harness_dir / "environment.yaml").exists():
+        environment_raw = _load_yaml_sections(harness_dir / "environment.yaml", ("llm", "graph"))
+        for key, value in environment_raw.items():
+            if isinstance(value, dict) and isinstance(raw.get(key), dict):
+                raw[key] = {**dict(raw[key]), **value}
+            else:
+                raw[key] = value
+    llm_raw = raw.get("llm") or {}
+    graph_raw = raw.get("graph") or {}
+    return {
+        "provider": str(llm_raw.get("provider", "")) if isinstance(llm_raw, dict) else "",
+        "graph_type": str(graph_raw.get("type", "single_agent")) if isinstance(graph_raw, dict) else "single_agent",
+    }
+
+
+_HARNESS_FILES = (
+    "systemprompt.md",
+    "task.md",
+    "environment.yaml",
+    "tools.yaml",
+    "skills.yaml",
+    "planner.yaml",
+    "middleware.yaml",
+    "memory.md",
+)
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _stamps(paths: tuple[Path, ...]) -> tuple[int, ...]:
+    return tuple(_mtime_ns(path) for path in paths)
+
+
+@dataclass(slots=True)
+class _ConfigSnapshot:
+    raw: dict[str, Any]
+    sources: tuple[Path, ...]
+    stamps: tuple[int, ...]
+    configs: dict[str, AppConfig] = field(default_factory=dict)
+
+
+# Parsed configs by (path, cwd); skill directories are also looked up relative to the cwd.
+_SNAPSHOTS: dict[tuple[str, str], _ConfigSnapshot] = {}
+
+
+def _config_snapshot(config_path: Path) -> _ConfigSnapshot:
+    """The merged mapping of ``config_path`` plus every file it was built from.
+
+    A known snapshot stays valid while none of its source files changed, which
+    takes only a stat per file; otherwise it comes from a current prebuild_config
+    entry or, failing that, from parsing the config again.
+    """
+    key = (str(config_path), os.getcwd())
+    snapshot = _SNAPSHOTS.get(key)
+    if snapshot is None or _stamps(snapshot.sources) != snapshot.stamps:
+        snapshot = _load_prebuilt(config_path) or _parse_config(config_path)
+        _SNAPSHOTS[key] = snapshot
+    return snapshot
+
+
+def _parse_config(config_path: Path) -> _ConfigSnapshot:
+    raw = _load_yaml(config_path)
+    if not isinstance(raw, dict):
+        raise ValueError("Config root must be a mapping")
+    harness_dir = _resolve_harness_dir(config_path, raw)
+    merged = _apply_harness_files(raw, harness_dir)
+    sources = _config_sources(config_path, harness_dir, merged)
+    return _ConfigSnapshot(raw=merged, sources=sources, stamps=_stamps(sources))
+
+
+def _config_sources(config_path: Path, harness_dir: Path | None, raw: dict[str, Any]) -> tuple[Path, ...]:
+    # Everything a run reads on behalf of this config: harness files, skill dirs, Pro2Guard models.
+    from .skills import skill_source_paths
+
+    sources = [config_path]
+    if harness_dir is not None:
+        sources.extend(harness_dir / name for name in _HARNESS_FILES)
+    skills = _skills_config(raw.get("skills", {}) or {})
+    sources.extend(skill_source_paths(config_path.parent, skills.base_dir, skills.enabled))
+    pro2guard_raw = raw.get("pro2guard")
+    if isinstance(pro2guard_raw, dict):
+        for key in ("model_path", "dtmc_path"):
+            value = str(pro2guard_raw.get(key) or "")
+            if value:
+                sources.append(_resolve_path(config_path.parent, value))
+    return tuple(sources)
+
+
+def _config_fingerprint(config_path: Path) -> tuple[int, ...]:
+    """Modification stamps of every file that loading ``config_path`` reads."""
+    return _config_snapshot(config_path).stamps
+
+
 def load_config(path: str | Path) -> AppConfig:
     config_path = Path(path).resolve()
-    raw = load_config_mapping(config_path)
+    containerized = os.environ.get("AGENT_CONTAINERIZED", "")
+    snapshot = _config_snapshot(config_path)
+    cfg = snapshot.configs.get(containerized)
+    if cfg is None:
+        cfg = snapshot.configs[containerized] = _build_config(config_path, snapshot.raw)
+    return cfg
+
+
+_PREBUILT_DIR = ".agent_cache"
+
+
+def _prebuilt_key(config_path: Path) -> list[Any]:
+    # Tie prebuilt entries to this module too, so code changes invalidate them.
+    # Kept in its JSON form so it compares equal to the stored copy.
+    return [str(config_path), os.getcwd(), Path(__file__).stat().st_mtime_ns]
+
+
+def _prebuilt_path(config_path: Path) -> Path:
+    digest = hashlib.sha256(str(config_path).encode("utf-8")).hexdigest()[:16]
+    return config_path.parent / _PREBUILT_DIR / f"{config_path.stem}-{digest}.json"
+
+
+_PREBUILT_SECTIONS: dict[str, type] = {
+    "llm": LLMConfig,
+    "agent": AgentConfig,
+    "graph": GraphConfig,
+    "monitoring": MonitoringConfig,
+    "skills": SkillsConfig,
+    "planner": PlannerConfig,
+    "middleware": MiddlewareConfig,
+    "security": SecurityConfig,
+    "aegis": AegisConfig,
+    "pro2guard": Pro2GuardConfig,
+    "agentdojo": AgentDojoConfig,
+    "container": ContainerConfig,
+}
+
+
+def _config_from_dict(data: dict[str, Any]) -> AppConfig:
+    kwargs = dict(data)
+    for name, section_type in _PREBUILT_SECTIONS.items():
+        kwargs[name] = section_type(**kwargs[name])
+    kwargs["tools"] = [ToolConfig(**tool) for tool in kwargs["tools"]]
+    return AppConfig(**kwargs)
+
+
+def _load_prebuilt(config_path: Path) -> _ConfigSnapshot | None:
+    cache_path = _prebuilt_path(config_path)
+    if not cache_path.exists():
+        return None
+    try:
+        with open(cache_path, "r", encoding="utf-8") as fh:
+            entry = json.load(fh)
+        if not isinstance(entry, dict) or entry.get("key") != _prebuilt_key(config_path):
+            return None
+        # The entry lists the files it was built from, so checking it never parses YAML.
+        sources = tuple(Path(path) for path in entry["sources"])
+        stamps = tuple(entry["stamps"])
+        raw = entry["raw"]
+        if not isinstance(raw, dict) or _stamps(sources) != stamps:
+            return None
+        configs = {str(mode): _config_from_dict(data) for mode, data in entry["configs"].items()}
+        return _ConfigSnapshot(raw=raw, sources=sources, stamps=stamps, configs=configs)
+    except Exception:
+        return None
+
+
+def load_prebuilt_config_mapping(path: str | Path) -> dict[str, Any]:
+    """Like load_config_mapping, but shared and served from a current prebuild_config entry when one exists."""
+    return _config_snapshot(Path(path).resolve()).raw
+
+
+def prebuild_config(path: str | Path) -> Path:
+    """Load a config and store the result as JSON under .agent_cache next to it.
+
+    Later load_config and load_prebuilt_config_mapping calls in fresh processes reuse
+    the stored AppConfig and raw mapping while the config, the files it pulls in, and
+    this module are unchanged. The entry is plain JSON, so a stale or planted file can
+    at worst be ignored, never executed.
+    """
+    config_path = Path(path).resolve()
+    containerized = os.environ.get("AGENT_CONTAINERIZED", "")
+    snapshot = _parse_config(config_path)
+    cfg = _build_config(config_path, snapshot.raw)
+    entry = {
+        "key": _prebuilt_key(config_path),
+        "sources": [str(source) for source in snapshot.sources],
+        "stamps": list(snapshot.stamps),
+        # Tools read their defaults from the raw mapping, so keep a copy of it alongside.
+        "raw": snapshot.raw,
+        "configs": {containerized: asdict(cfg)},
+    }
+    try:
+        payload = json.dumps(entry)
+    except (TypeError, ValueError) as exc:
+        # Unquoted YAML dates and the like would come back as strings, so refuse them.
+        raise ValueError(f"Cannot prebuild {config_path}: config values must be JSON-serializable ({exc})") from exc
+    cache_path = _prebuilt_path(config_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp")
+    try:
+        tmp_path.write_text(payload, encoding="utf-8")
+        tmp_path.replace(cache_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return cache_path
+
+
+def _skills_config(skills_raw: Any) -> SkillsConfig:
+    if isinstance(skills_raw, str):
+        return SkillsConfig(enabled=[skills_raw])
+    if isinstance(skills_raw, list):
+        return SkillsConfig(enabled=skills_raw)
+    if isinstance(skills_raw, dict):
+        enabled_raw = skills_raw.get("enabled", []) or []
+        if isinstance(enabled_raw, str):
+            enabled = [enabled_raw]
+        elif isinstance(enabled_raw, list):
+            enabled = enabled_raw
+        else:
+            enabled = []
+        return SkillsConfig(
+            enabled=enabled,
+            base_dir=str(skills_raw.get("base_dir", "skills")),
+        )
+    return SkillsConfig()
+
+
+def _build_config(config_path: Path, raw: dict[str, Any] | None = None) -> AppConfig:
+    if raw is None:
+        raw = load_config_mapping(config_path)
 
     llm_raw = _require(raw, "llm")
     agent_raw = _require(raw, "agent")
@@ -342,6 +635,7 @@ def load_config(path: str | Path) -> AppConfig:
         base_url=str(llm_raw.get("base_url", "")),
         api_key=str(llm_raw.get("api_key", "")),
         request_timeout=_optional_int(llm_raw.get("request_timeout", 120), 120),
+        cache_responses=bool(llm_raw.get("cache_responses", False)),
     )
 
     agent = AgentConfig(
@@ -424,6 +718,7 @@ def load_config(path: str | Path) -> AppConfig:
         react_prompt=str(graph_raw.get("react_prompt", "")),
         react_max_iterations=_optional_int(graph_raw.get("react_max_iterations", 15), 15),
         react_max_execution_time=_optional_int(graph_raw.get("react_max_execution_time", 120), 120),
+        max_tool_payload_chars=_optional_int(graph_raw.get("max_tool_payload_chars", 1_000_000), 1_000_000),
     )
 
     monitoring_raw = raw.get("monitoring", {}) or {}
@@ -431,27 +726,10 @@ def load_config(path: str | Path) -> AppConfig:
         enabled=bool(monitoring_raw.get("enabled", False)),
         output_path=str(monitoring_raw.get("output_path", "trace.json")),
         print_trace=bool(monitoring_raw.get("print_trace", False)),
+        record_usage=bool(monitoring_raw.get("record_usage", True)),
     )
 
-    skills_raw = raw.get("skills", {}) or {}
-    if isinstance(skills_raw, str):
-        skills = SkillsConfig(enabled=[skills_raw])
-    elif isinstance(skills_raw, list):
-        skills = SkillsConfig(enabled=skills_raw)
-    elif isinstance(skills_raw, dict):
-        enabled_raw = skills_raw.get("enabled", []) or []
-        if isinstance(enabled_raw, str):
-            enabled = [enabled_raw]
-        elif isinstance(enabled_raw, list):
-            enabled = enabled_raw
-        else:
-            enabled = []
-        skills = SkillsConfig(
-            enabled=enabled,
-            base_dir=str(skills_raw.get("base_dir", "skills")),
-        )
-    else:
-        skills = SkillsConfig()
+    skills = _skills_config(raw.get("skills", {}) or {})
 
     planner_raw = raw.get("planner", {}) or {}
     if isinstance(planner_raw, dict):
@@ -5,12 +5,11 @@ import functools
 import inspect
 import json
 import re
+from collections.abc import Callable, Iterator, Mapping
 from typing import Any
 import time
 
-from langgraph.graph import END, StateGraph
-
-from .config import AppConfig
+from .config import AppConfig, ToolConfig
 from .llm import LLMAdapter
 from .skills import load_enabled_skills, render_skill_context, validate_skill_tools
 from .planner import render_plan_context, mark_plan_progress, complete_plan_on_final
@@ -40,6 +39,10 @@ def _build_react_user_input(state: dict[str, Any]) -> str:
     return ""
 
 
+_REACT_ACTION_RE = re.compile(r"Action:\s*([a-zA-Z0-9_\-]+)")
+_REACT_ACTION_INPUT_RE = re.compile(r"Action Input:\s*")
+
+
 def _extract_react_actions(log_text: str) -> list[dict[str, Any]]:
     actions: list[dict[str, Any]] = []
     if not log_text:
@@ -48,16 +51,17 @@ def _extract_react_actions(log_text: str) -> list[dict[str, Any]]:
     text = str(log_text)
     pos = 0
     while True:
-        action_match = re.search(r"Action:\s*([a-zA-Z0-9_\-]+)", text[pos:])
+        # Searching from an offset avoids copying the remaining log for every action.
+        action_match = _REACT_ACTION_RE.search(text, pos)
         if not action_match:
             break
         action_name = action_match.group(1)
-        action_abs_start = pos + action_match.start()
-        action_abs_end = pos + action_match.end()
-        input_match = re.search(r"Action Input:\s*", text[action_abs_end:])
+        action_abs_start = action_match.start()
+        action_abs_end = action_match.end()
+        input_match = _REACT_ACTION_INPUT_RE.search(text, action_abs_end)
         if not input_match:
             break
-        input_start = action_abs_end + input_match.end()
+        input_start = input_match.end()
         while input_start < len(text) and text[input_start].isspace():
             input_start += 1
 
@@ -120,6 +124,17 @@ def _extract_react_actions(log_text: str) -> list[dict[str, Any]]:
     return actions
 
 
+def _estimated_tool_usage(estimate_tokens: Callable[[str], int], tool_input: Any, output: Any) -> dict[str, Any]:
+    input_tokens = estimate_tokens(str(tool_input))
+    output_tokens = estimate_tokens(str(output))
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "source": "estimated",
+    }
+
+
 def _expand_react_steps(
     intermediate_steps: list[Any],
     raw_tools: dict[str, Any],
@@ -148,12 +163,7 @@ def _expand_react_steps(
                                 recovered_output = str(raw_tools[recovered_name](recovered_input))
                         except Exception as exc:
                             recovered_output = f"Tool execution failed: {exc}"
-                    usage = {
-                        "input_tokens": estimate_tokens(str(recovered_input)),
-                        "output_tokens": estimate_tokens(str(recovered_output)),
-                        "total_tokens": estimate_tokens(str(recovered_input)) + estimate_tokens(str(recovered_output)),
-                        "source": "estimated",
-                    }
+                    usage = _estimated_tool_usage(estimate_tokens, recovered_input, recovered_output)
                     expanded.append(
                         {
                             "tool": recovered_name,
@@ -184,12 +194,7 @@ def _expand_react_steps(
             if line.strip().lower().startswith("thought"):
                 thought_text = line.strip()
                 break
-        usage = {
-            "input_tokens": estimate_tokens(str(tool_input)),
-            "output_tokens": estimate_tokens(str(observation)),
-            "total_tokens": estimate_tokens(str(tool_input)) + estimate_tokens(str(observation)),
-            "source": "estimated",
-        }
+        usage = _estimated_tool_usage(estimate_tokens, tool_input, observation)
         expanded.append(
             {
                 "tool": tool_name,
@@ -213,11 +218,14 @@ def _literal_ast_value(node: ast.AST) -> Any:
         return ast.unparse(node) if hasattr(ast, "unparse") else ""
 
 
+_FUNCTION_CALL_RE = re.compile(r"([a-zA-Z_]\w*)\s*\(")
+
+
 def _parse_function_style_action(action_text: str, tool_names: set[str]) -> tuple[str, dict[str, Any]] | None:
     text = str(action_text).strip()
     if not text:
         return None
-    call_match = re.search(r"([a-zA-Z_]\w*)\s*\(", text)
+    call_match = _FUNCTION_CALL_RE.search(text)
     if not call_match:
         return None
     tool_name = call_match.group(1)
@@ -501,12 +509,38 @@ def _build_traced_react_tool(name: str, fn: Any, cfg: AppConfig, middleware: Any
     return _wrapped
 
 
+class _LazyTools(Mapping[str, Any]):
+    """Tool registry that imports each tool on first lookup instead of at graph build."""
+
+    def __init__(self, tool_cfgs: list[ToolConfig]) -> None:
+        self._cfgs = {t.name: t for t in tool_cfgs}
+        self._loaded: dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        fn = self._loaded.get(name)
+        if fn is None:
+            fn = load_tool(self._cfgs[name])
+            self._loaded[name] = fn
+        return fn
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._cfgs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._cfgs)
+
+    def __len__(self) -> int:
+        return len(self._cfgs)
+
+
 def build_graph(cfg: AppConfig) -> Any:
     if cfg.graph.type == "langchain_react":
         return _build_langchain_react_graph(cfg)
 
+    from langgraph.graph import END, StateGraph
+
     llm = LLMAdapter(cfg.llm)
-    tools = {t.name: load_tool(t) for t in cfg.tools}
+    tools = _LazyTools(cfg.tools)
 
     builder: StateGraph = StateGraph(dict)
     builder.add_node("agent", agent_node(cfg, llm))
@@ -525,13 +559,73 @@ def build_graph(cfg: AppConfig) -> Any:
     return builder.compile()
 
 
+@functools.lru_cache(maxsize=8)
+def _build_react_prompt(prompt_text: str, role_prefix: str) -> Any:
+    try:
+        from langchain_core.prompts import PromptTemplate  # type: ignore
+    except Exception as exc:  # pragma: no cover - runtime import
+        raise RuntimeError("Missing dependency: langchain_core") from exc
+
+    if prompt_text:
+        if role_prefix:
+            prompt_text = f"{role_prefix}\n\n{prompt_text}"
+        PROMPT = PromptTemplate.from_template(prompt_text)
+    else:
+        try:
+            from langchain.agents.react.prompt import PROMPT  # type: ignore
+            extra_rules = (
+                "Additional rules:\n"
+                "- Output exactly one action per response.\n"
+                "- Do not emit multiple Action blocks in one message.\n"
+                "- Do not invent Observation lines; wait for the tool result.\n"
+                "- If you are done, output Final Answer instead of another Thought-only message.\n"
+                "- Do not output </think> or other XML-style reasoning tags.\n"
+                "- The Action line must contain only the tool name, for example: Action: research_search.\n"
+                "- Put all arguments only in Action Input JSON; never write Python calls like research_search(query=...).\n\n"
+            )
+            if role_prefix:
+                PROMPT = PromptTemplate.from_template(f"{role_prefix}\n\n{extra_rules}{PROMPT.template}")
+            else:
+                PROMPT = PromptTemplate.from_template(f"{extra_rules}{PROMPT.template}")
+        except Exception:
+            prompt_text = (
+                "You are a helpful assistant.\n\n"
+                "Answer the following questions as best you can. You have access to the following tools:\n\n"
+                "{tools}\n\n"
+                "Use the following format:\n\n"
+                "Question: the input question you must answer\n"
+                "Thought: you should always think about what to do\n"
+                "Action: the action to take, should be one of [{tool_names}]\n"
+                "Action Input: the input to the action\n"
+                "Observation: the result of the action\n"
+                "... (this Thought/Action/Action Input/Observation can repeat)\n"
+                "Thought: I now know the final answer\n"
+                "Final Answer: the final answer to the original question\n\n"
+                "Additional rules:\n"
+                "- Output exactly one action per response.\n"
+                "- Do not emit multiple Action blocks in one message.\n"
+                "- Do not invent Observation lines; wait for the tool result.\n"
+                "- If you are done, output Final Answer instead of another Thought-only message.\n"
+                "- Do not output </think> or other XML-style reasoning tags.\n"
+                "- The Action line must contain only the tool name, for example: Action: research_search.\n"
+                "- Put all arguments only in Action Input JSON; never write Python calls like research_search(query=...).\n\n"
+                "Question: {input}\n"
+                "{agent_scratchpad}"
+            )
+            if role_prefix:
+                prompt_text = f"{role_prefix}\n\n{prompt_text}"
+            PROMPT = PromptTemplate.from_template(prompt_text)
+    return PROMPT
+
+
 def _build_langchain_react_graph(cfg: AppConfig) -> Any:
+    from langgraph.graph import END, StateGraph
+
     llm = LLMAdapter(cfg.llm)
     lc_model = llm.get_lc_chat_model()
 
     try:
         from langchain_core.tools import StructuredTool  # type: ignore
-        from langchain_core.prompts import PromptTemplate  # type: ignore
     except Exception as exc:  # pragma: no cover - runtime import
         raise RuntimeError("Missing dependency: langchain_core") from exc
 
@@ -589,55 +683,7 @@ def _build_langchain_react_graph(cfg: AppConfig) -> Any:
     if missing_tool_warnings:
         role_parts.append("# Harness Warnings\n" + "\n".join(f"- {item}" for item in missing_tool_warnings))
     role_prefix = "\n\n".join(part for part in role_parts if part)
-    if prompt_text:
-        if role_prefix:
-            prompt_text = f"{role_prefix}\n\n{prompt_text}"
-        PROMPT = PromptTemplate.from_template(prompt_text)
-    else:
-        try:
-            from langchain.agents.react.prompt import PROMPT  # type: ignore
-            extra_rules = (
-                "Additional rules:\n"
-                "- Output exactly one action per response.\n"
-                "- Do not emit multiple Action blocks in one message.\n"
-                "- Do not invent Observation lines; wait for the tool result.\n"
-                "- If you are done, output Final Answer instead of another Thought-only message.\n"
-                "- Do not output </think> or other XML-style reasoning tags.\n"
-                "- The Action line must contain only the tool name, for example: Action: research_search.\n"
-                "- Put all arguments only in Action Input JSON; never write Python calls like research_search(query=...).\n\n"
-            )
-            if role_prefix:
-                PROMPT = PromptTemplate.from_template(f"{role_prefix}\n\n{extra_rules}{PROMPT.template}")
-            else:
-                PROMPT = PromptTemplate.from_template(f"{extra_rules}{PROMPT.template}")
-        except Exception:
-            prompt_text = (
-                "You are a helpful assistant.\n\n"
-                "Answer the following questions as best you can. You have access to the following tools:\n\n"
-                "{tools}\n\n"
-                "Use the following format:\n\n"
-                "Question: the input question you must answer\n"
-                "Thought: you should always think about what to do\n"
-                "Action: the action to take, should be one of [{tool_names}]\n"
-                "Action Input: the input to the action\n"
-                "Observation: the result of the action\n"
-                "... (this Thought/Action/Action Input/Observation can repeat)\n"
-                "Thought: I now know the final answer\n"
-                "Final Answer: the final answer to the original question\n\n"
-                "Additional rules:\n"
-                "- Output exactly one action per response.\n"
-                "- Do not emit multiple Action blocks in one message.\n"
-                "- Do not invent Observation lines; wait for the tool result.\n"
-                "- If you are done, output Final Answer instead of another Thought-only message.\n"
-                "- Do not output </think> or other XML-style reasoning tags.\n"
-                "- The Action line must contain only the tool name, for example: Action: research_search.\n"
-                "- Put all arguments only in Action Input JSON; never write Python calls like research_search(query=...).\n\n"
-                "Question: {input}\n"
-                "{agent_scratchpad}"
-            )
-            if role_prefix:
-                prompt_text = f"{role_prefix}\n\n{prompt_text}"
-            PROMPT = PromptTemplate.from_template(prompt_text)
+    PROMPT = _build_react_prompt(prompt_text, role_prefix)
 
     raw_tools: dict[str, Any] = {}
     tools = []
@@ -695,6 +741,7 @@ def _build_langchain_react_graph(cfg: AppConfig) -> Any:
     def _node(state: dict[str, Any]) -> dict[str, Any]:
         nonlocal active_state
         start = time.time()
+        start_ns = time.perf_counter_ns()
         active_state = state
         user_input = _build_react_user_input(state)
         plan_context = render_plan_context(state)
@@ -816,11 +863,12 @@ def _build_langchain_react_graph(cfg: AppConfig) -> Any:
             "source": "estimated",
         }
         _update_usage_totals(state, usage)
+        latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         trace.append(
             {
                 "step": "langchain_react",
                 "timestamp": start,
-                "latency_ms": int((time.time() - start) * 1000),
+                "latency_ms": latency_ms,
                 "input": {"input": user_input},
                 "output": {"content": output, "intermediate_steps": steps},
                 "usage": usage,
@@ -845,7 +893,7 @@ def _build_langchain_react_graph(cfg: AppConfig) -> Any:
                         "intermediate_steps": len(steps),
                     },
                     "actions": [],
-                    "latency_ms": int((time.time() - start) * 1000),
+                    "latency_ms": latency_ms,
                     "usage": usage,
                 },
             },
@@ -866,6 +914,9 @@ def _build_langchain_react_graph(cfg: AppConfig) -> Any:
     return builder.compile()
 
 
+_JSON_BLOCK_RE = re.compile(r"(\{.*\}|\[.*\])", re.DOTALL)
+
+
 def _maybe_parse_json(value: Any) -> Any:
     if not isinstance(value, str):
         return value
@@ -877,7 +928,7 @@ def _maybe_parse_json(value: Any) -> Any:
             return json.loads(text)
         except Exception:
             return value
-    match = re.search(r"(\{.*\}|\[.*\])", text, re.DOTALL)
+    match = _JSON_BLOCK_RE.search(text)
     if match:
         try:
             return json.loads(match.group(1))
@@ -124,6 +124,14 @@ def classify_tool(name: str, payload: Any) -> str:
     return "unknown"
 
 
+_DESTRUCTIVE_SQL_RE = re.compile(r"\b(drop|truncate|alter\s+table|delete\s+from)\b", re.I)
+_SQL_INJECTION_RE = re.compile(r"\b(union\s+select|or\s+['\"]?1['\"]?\s*=\s*['\"]?1|--|;\s*drop)\b", re.I)
+_SHELL_META_RE = re.compile(r"[;&|`]\s*|\$\(|\|\|")
+_DESTRUCTIVE_SHELL_RE = re.compile(r"\brm\s+-rf\s+(/|~|\*)")
+_SHELL_EGRESS_RE = re.compile(r"\b(curl|wget|nc|ncat)\b.*https?://", re.I)
+_SUPPLY_CHAIN_RE = re.compile(r"\b(publish|deploy|release|push)\b", re.I)
+
+
 def collect_signals(category: str, name: str, payload: Any, state: dict[str, Any]) -> list[tuple[str, str, str]]:
     values = _flatten_strings(payload)
     joined = "\n".join(values)
@@ -143,17 +151,17 @@ def collect_signals(category: str, name: str, payload: Any, state: dict[str, Any
         signals.append(("secret_in_arguments", severity, "Tool arguments contain credential-like material"))
 
     if category == "database":
-        if re.search(r"\b(drop|truncate|alter\s+table|delete\s+from)\b", joined, re.I):
+        if _DESTRUCTIVE_SQL_RE.search(joined):
             signals.append(("destructive_sql", "HIGH", "Destructive SQL keyword in tool arguments"))
-        if re.search(r"\b(union\s+select|or\s+['\"]?1['\"]?\s*=\s*['\"]?1|--|;\s*drop)\b", joined, re.I):
+        if _SQL_INJECTION_RE.search(joined):
             signals.append(("sql_injection", "HIGH", "SQL injection pattern in tool arguments"))
 
     if category == "shell":
-        if re.search(r"[;&|`]\s*|\$\(|\|\|", joined):
+        if _SHELL_META_RE.search(joined):
             signals.append(("shell_metacharacters", "HIGH", "Shell metacharacters in command arguments"))
-        if re.search(r"\brm\s+-rf\s+(/|~|\*)", joined):
+        if _DESTRUCTIVE_SHELL_RE.search(joined):
             signals.append(("destructive_shell", "CRITICAL", "Destructive shell command pattern"))
-        if re.search(r"\b(curl|wget|nc|ncat)\b.*https?://", joined, re.I):
+        if _SHELL_EGRESS_RE.search(joined):
             signals.append(("shell_network_egress", "HIGH", "Shell command performs network egress"))
 
     if category in {"network", "communication"}:
@@ -162,7 +170,7 @@ def collect_signals(category: str, name: str, payload: Any, state: dict[str, Any
         if _contains_pii(joined):
             signals.append(("pii_external_egress", "HIGH", "PII-like data in external-facing tool arguments"))
 
-    if category == "supply-chain" and re.search(r"\b(publish|deploy|release|push)\b", name, re.I):
+    if category == "supply-chain" and _SUPPLY_CHAIN_RE.search(name):
         signals.append(("supply_chain_side_effect", "MEDIUM", "Supply-chain or deployment side effect"))
 
     return signals
@@ -194,25 +202,38 @@ def _flatten_strings(value: Any, limit: int = 200) -> list[str]:
     return out
 
 
+_URL_RE = re.compile(r"https?://|ftp://", re.I)
+
+
 def _looks_like_url(value: str) -> bool:
-    return bool(re.search(r"https?://|ftp://", value, re.I))
+    return bool(_URL_RE.search(value))
 
 
-def _contains_secret(text: str) -> bool:
-    patterns = [
+_SECRET_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
         r"(?i)(api[_-]?key|secret|token|password|passwd|credential)[\s:=]+[^\s,;]{8,}",
         r"sk-[A-Za-z0-9_-]{16,}",
         r"-----BEGIN [A-Z ]*PRIVATE KEY-----",
         r"AKIA[0-9A-Z]{16}",
-    ]
-    return any(re.search(pattern, text) for pattern in patterns)
+    )
+)
+
+
+def _contains_secret(text: str) -> bool:
+    return any(pattern.search(text) for pattern in _SECRET_PATTERNS)
+
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_SSN_RE = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+_CARD_RE = re.compile(r"\b(?:\d[ -]*?){13,16}\b")
 
 
 def _contains_pii(text: str) -> bool:
     return bool(
-        re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
-        or re.search(r"\b\d{3}-\d{2}-\d{4}\b", text)
-        or re.search(r"\b(?:\d[ -]*?){13,16}\b", text)
+        _EMAIL_RE.search(text)
+        or _SSN_RE.search(text)
+        or _CARD_RE.search(text)
     )
 
 
@@ -1,22 +1,57 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
 
 from .config import LLMConfig
 
+try:
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage  # type: ignore
+except Exception:  # pragma: no cover - runtime import
+    AIMessage = HumanMessage = SystemMessage = None  # type: ignore[assignment, misc]
+
+
+_UNSET: Any = object()
+
 
-@dataclass
 class LLMResponse:
-    content: str
-    usage: dict[str, Any] | None = None
+    __slots__ = ("content", "raw", "cached", "_usage")
+
+    def __init__(
+        self, content: str, usage: dict[str, Any] | None = None, raw: Any = None, cached: bool = False
+    ) -> None:
+        self.content = content
+        self.raw = raw
+        # True when the content was replayed from the response cache instead of a provider call.
+        self.cached = cached
+        # Usage passed in explicitly wins over anything extracted from raw.
+        self._usage = usage if usage is not None else _UNSET
+
+    @property
+    def usage(self) -> dict[str, Any] | None:
+        # Token usage is only extracted from the provider result when someone asks for it.
+        if self._usage is _UNSET:
+            self._usage = _extract_usage(self.raw) if self.raw is not None else None
+        return self._usage
+
+    def __repr__(self) -> str:
+        return f"LLMResponse(content={self.content!r}, usage={self.usage!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LLMResponse):
+            return NotImplemented
+        return (self.content, self.usage) == (other.content, other.usage)
+
+    __hash__ = None  # type: ignore[assignment]
 
 
 class LLMAdapter:
     def __init__(self, config: LLMConfig) -> None:
         self.config = config
         self._client = None
-        self._tokenizer = None
+        self._role_to_cls: dict[str, Any] | None = None
 
     def _lazy_init(self) -> None:
         if self._client is not None:
@@ -25,87 +60,51 @@ class LLMAdapter:
         if provider == "mock":
             self._client = "mock"
             return
-        if provider == "openai":
-            try:
-                from langchain_openai import ChatOpenAI  # type: ignore
-            except Exception as exc:  # pragma: no cover - runtime import
-                raise RuntimeError("Missing dependency: langchain_openai") from exc
-            kwargs: dict[str, Any] = {}
-            if self.config.base_url:
-                kwargs["base_url"] = self.config.base_url
-            if self.config.api_key:
-                kwargs["api_key"] = self.config.api_key
-            if self.config.request_timeout is not None:
-                kwargs["request_timeout"] = self.config.request_timeout
-            self._client = ChatOpenAI(
-                model=self.config.model,
-                temperature=self.config.temperature,
-                **kwargs,
-            )
-            return
-        if provider == "anthropic":
-            try:
-                from langchain_anthropic import ChatAnthropic  # type: ignore
-            except Exception as exc:  # pragma: no cover - runtime import
-                raise RuntimeError("Missing dependency: langchain_anthropic") from exc
-            kwargs = {}
-            if self.config.api_key:
-                kwargs["api_key"] = self.config.api_key
-            self._client = ChatAnthropic(
-                model=self.config.model,
-                temperature=self.config.temperature,
-                **kwargs,
-            )
-            return
-        if provider == "vllm_openai":
-            try:
-                from langchain_openai import ChatOpenAI  # type: ignore
-            except Exception as exc:  # pragma: no cover - runtime import
-                raise RuntimeError("Missing dependency: langchain_openai") from exc
-            if not self.config.base_url:
-                raise ValueError("vllm_openai requires llm.base_url")
-            kwargs = {"base_url": self.config.base_url}
-            if self.config.api_key:
-                kwargs["api_key"] = self.config.api_key
-            else:
-                # vLLM servers often do not require auth, but the OpenAI client enforces api_key.
-                kwargs["api_key"] = "local-vllm"
-            if self.config.request_timeout is not None:
-                kwargs["request_timeout"] = self.config.request_timeout
-            self._client = ChatOpenAI(
-                model=self.config.model,
-                temperature=self.config.temperature,
-                **kwargs,
-            )
-            return
-        raise ValueError(f"Unknown provider: {self.config.provider}")
+        factory = _PROVIDERS.get(provider)
+        if factory is None:
+            raise ValueError(f"Unknown provider: {self.config.provider}")
+        self._client = factory(self.config)
+        if HumanMessage is not None:
+            self._role_to_cls = {
+                "system": SystemMessage,
+                "assistant": AIMessage,
+                "user": HumanMessage,
+            }
 
     def chat(self, messages: list[dict[str, str]]) -> LLMResponse:
         self._lazy_init()
         if self._client == "mock":
-            last = messages[-1]["content"] if messages else ""
-            return LLMResponse(content=f"MOCK: {last}")
+            return _mock_response(messages)
+        key = self._response_key(messages)
+        cached = _cached_response(key)
+        if cached is not None:
+            return cached
+        result = self._client.invoke(self._to_lc_messages(messages))
+        _store_response(key, result.content)
+        return LLMResponse(content=result.content, raw=result)
+
+    def _response_key(self, messages: list[dict[str, str]]) -> tuple[Any, ...] | None:
+        # Only greedy decoding is reproducible enough to replay a previous answer.
+        config = self.config
+        if not config.cache_responses or config.temperature != 0:
+            return None
+        return (
+            config.provider,
+            config.model,
+            config.base_url,
+            tuple((msg.get("role", ""), msg.get("content", "")) for msg in messages),
+        )
 
+    def _to_lc_messages(self, messages: list[dict[str, str]]) -> list[Any]:
         # LangChain model: expects list of BaseMessage
-        try:
-            from langchain_core.messages import HumanMessage, SystemMessage, AIMessage  # type: ignore
-        except Exception as exc:  # pragma: no cover - runtime import
-            raise RuntimeError("Missing dependency: langchain_core") from exc
-
-        lc_messages = []
-        for msg in messages:
-            role = msg.get("role")
-            content = msg.get("content", "")
-            if role == "system":
-                lc_messages.append(SystemMessage(content=content))
-            elif role == "assistant":
-                lc_messages.append(AIMessage(content=content))
-            else:
-                lc_messages.append(HumanMessage(content=content))
-
-        result = self._client.invoke(lc_messages)
-        usage = _extract_usage(result)
-        return LLMResponse(content=result.content, usage=usage)
+        role_to_cls = self._role_to_cls
+        if role_to_cls is None:
+            raise RuntimeError("Missing dependency: langchain_core")
+        class_for = role_to_cls.get
+        return [
+            class_for(role, HumanMessage)(content=content)
+            for role, content in ((msg.get("role"), msg.get("content", "")) for msg in messages)
+        ]
 
     def get_lc_chat_model(self) -> Any:
         self._lazy_init()
@@ -116,16 +115,105 @@ class LLMAdapter:
     def estimate_tokens(self, text: str) -> int:
         if not text:
             return 0
-        if self._tokenizer is None:
-            self._tokenizer = _load_tokenizer(self.config.model)
-        if self._tokenizer is not None:
-            try:
-                return len(self._tokenizer.encode(text))
-            except Exception:
-                pass
-        return max(1, len(text) // 4)
+        return _estimate_tokens(self.config.model, text)
+
+
+def _make_openai(config: LLMConfig) -> Any:
+    try:
+        from langchain_openai import ChatOpenAI  # type: ignore
+    except Exception as exc:  # pragma: no cover - runtime import
+        raise RuntimeError("Missing dependency: langchain_openai") from exc
+    kwargs: dict[str, Any] = {}
+    if config.base_url:
+        kwargs["base_url"] = config.base_url
+    if config.api_key:
+        kwargs["api_key"] = config.api_key
+    if config.request_timeout is not None:
+        kwargs["request_timeout"] = config.request_timeout
+    return ChatOpenAI(
+        model=config.model,
+        temperature=config.temperature,
+        **kwargs,
+    )
+
+
+def _make_anthropic(config: LLMConfig) -> Any:
+    try:
+        from langchain_anthropic import ChatAnthropic  # type: ignore
+    except Exception as exc:  # pragma: no cover - runtime import
+        raise RuntimeError("Missing dependency: langchain_anthropic") from exc
+    kwargs: dict[str, Any] = {}
+    if config.api_key:
+        kwargs["api_key"] = config.api_key
+    return ChatAnthropic(
+        model=config.model,
+        temperature=config.temperature,
+        **kwargs,
+    )
+
 
+def _make_vllm_openai(config: LLMConfig) -> Any:
+    try:
+        from langchain_openai import ChatOpenAI  # type: ignore
+    except Exception as exc:  # pragma: no cover - runtime import
+        raise RuntimeError("Missing dependency: langchain_openai") from exc
+    if not config.base_url:
+        raise ValueError("vllm_openai requires llm.base_url")
+    kwargs: dict[str, Any] = {"base_url": config.base_url}
+    if config.api_key:
+        kwargs["api_key"] = config.api_key
+    else:
+        # vLLM servers often do not require auth, but the OpenAI client enforces api_key.
+        kwargs["api_key"] = "local-vllm"
+    if config.request_timeout is not None:
+        kwargs["request_timeout"] = config.request_timeout
+    return ChatOpenAI(
+        model=config.model,
+        temperature=config.temperature,
+        **kwargs,
+    )
+
+
+_RESPONSE_CACHE: OrderedDict[tuple[Any, ...], str] = OrderedDict()
+_RESPONSE_CACHE_SIZE = 256
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def _cached_response(key: tuple[Any, ...] | None) -> LLMResponse | None:
+    if key is None:
+        return None
+    with _RESPONSE_CACHE_LOCK:
+        content = _RESPONSE_CACHE.get(key)
+        if content is None:
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+    # No provider call happened, so there is no reported usage to attach.
+    return LLMResponse(content=content, cached=True)
+
+
+def _store_response(key: tuple[Any, ...] | None, content: str) -> None:
+    if key is None:
+        return
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = content
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
+
+def _mock_response(messages: list[dict[str, str]]) -> LLMResponse:
+    last = messages[-1]["content"] if messages else ""
+    return LLMResponse(content=f"MOCK: {last}")
 
+
+_PROVIDERS: dict[str, Callable[[LLMConfig], Any]] = {
+    "openai": _make_openai,
+    "anthropic": _make_anthropic,
+    "vllm_openai": _make_vllm_openai,
+}
+
+
+@functools.lru_cache(maxsize=16)
 def _load_tokenizer(model_name: str) -> Any | None:
     try:
         import tiktoken  # type: ignore
@@ -140,6 +228,38 @@ def _load_tokenizer(model_name: str) -> Any | None:
             return None
 
 
+_TOKEN_COUNTS: OrderedDict[tuple[str, int, int], int] = OrderedDict()
+_TOKEN_COUNTS_SIZE = 4096
+_TOKEN_COUNTS_LOCK = threading.Lock()
+
+
+def _estimate_tokens(model_name: str, text: str) -> int:
+    # The system prompt and history are re-estimated every turn, so remember per-message counts.
+    # Keying on the text's hash and length keeps the cache from holding every message alive.
+    key = (model_name, hash(text), len(text))
+    with _TOKEN_COUNTS_LOCK:
+        count = _TOKEN_COUNTS.get(key)
+        if count is not None:
+            _TOKEN_COUNTS.move_to_end(key)
+            return count
+    count = _count_tokens(model_name, text)
+    with _TOKEN_COUNTS_LOCK:
+        _TOKEN_COUNTS[key] = count
+        while len(_TOKEN_COUNTS) > _TOKEN_COUNTS_SIZE:
+            _TOKEN_COUNTS.popitem(last=False)
+    return count
+
+
+def _count_tokens(model_name: str, text: str) -> int:
+    tokenizer = _load_tokenizer(model_name)
+    if tokenizer is not None:
+        try:
+            return len(tokenizer.encode(text))
+        except Exception:
+            pass
+    return max(1, len(text) // 4)
+
+
 def _extract_usage(result: Any) -> dict[str, Any] | None:
     usage = getattr(result, "usage_metadata", None)
     if isinstance(usage, dict):
@@ -147,20 +267,25 @@ def _extract_usage(result: Any) -> dict[str, Any] | None:
         completion = usage.get("output_tokens")
         total = usage.get("total_tokens")
         if prompt is not None or completion is not None or total is not None:
+            details = usage.get("input_token_details") or {}
             return {
                 "prompt_tokens": prompt,
                 "completion_tokens": completion,
                 "total_tokens": total,
+                "cached_tokens": int(details.get("cache_read") or 0),
                 "source": "reported",
             }
     metadata = getattr(result, "response_metadata", None)
     if isinstance(metadata, dict):
         token_usage = metadata.get("token_usage") or metadata.get("usage")
         if isinstance(token_usage, dict):
+            details = token_usage.get("prompt_tokens_details") or {}
+            cached = details.get("cached_tokens") or token_usage.get("cache_read_input_tokens")
             return {
                 "prompt_tokens": token_usage.get("prompt_tokens"),
                 "completion_tokens": token_usage.get("completion_tokens"),
                 "total_tokens": token_usage.get("total_tokens"),
+                "cached_tokens": int(cached or 0),
                 "source": "reported",
             }
     return None
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import contextlib
+import functools
 import io
 import json
 import os
@@ -17,24 +18,22 @@ if __package__ is None or __package__ == "":
 
 try:
     from dataclasses import asdict as _asdict
-    from .config import load_config
-    from .graph import build_graph
+    from .config import _config_fingerprint, load_config, prebuild_config
     from .nodes import build_initial_messages, _flush_trace_snapshot
     from .planner import initialize_plan
     from .skills import load_enabled_skills, validate_skill_tools
     from .agentdojo_adapter import augment_task as augment_task_with_agentdojo_context, evaluate_last_session as evaluate_agentdojo_session, reset_session as reset_agentdojo_session
     from .container_runtime import run_once_in_container, should_run_in_container
-    from .tools import augment_task_with_research_context, augment_task_with_trip_context, recover_written_file
+    from .tools import augment_task_with_research_context, augment_task_with_trip_context, recover_written_file, run_directory
 except ImportError:  # Fallback when executed as a script
     from dataclasses import asdict as _asdict
-    from agent_scaffold.config import load_config
-    from agent_scaffold.graph import build_graph
+    from agent_scaffold.config import _config_fingerprint, load_config, prebuild_config
     from agent_scaffold.nodes import build_initial_messages, _flush_trace_snapshot
     from agent_scaffold.planner import initialize_plan
     from agent_scaffold.skills import load_enabled_skills, validate_skill_tools
     from agent_scaffold.agentdojo_adapter import augment_task as augment_task_with_agentdojo_context, evaluate_last_session as evaluate_agentdojo_session, reset_session as reset_agentdojo_session
     from agent_scaffold.container_runtime import run_once_in_container, should_run_in_container
-    from agent_scaffold.tools import augment_task_with_research_context, augment_task_with_trip_context, recover_written_file
+    from agent_scaffold.tools import augment_task_with_research_context, augment_task_with_trip_context, recover_written_file, run_directory
 
 
 def _slugify(value: str) -> str:
@@ -163,6 +162,17 @@ def _split_system_messages(messages: list[dict[str, str]]) -> tuple[list[dict[st
     return system_messages, other_messages
 
 
+@functools.lru_cache(maxsize=4)
+def _build_graph_cached(cfg_path: str, fingerprint: tuple[int, ...], containerized: str) -> Any:
+    # langgraph/langchain are slow to import; only pay for them when a run actually starts.
+    try:
+        from .graph import build_graph
+    except ImportError:  # Fallback when executed as a script
+        from agent_scaffold.graph import build_graph
+
+    return build_graph(load_config(cfg_path))
+
+
 def run_once(
     cfg_path: str,
     user_input: str | None,
@@ -187,7 +197,11 @@ def run_once(
             run_dir=run_dir,
         )
 
-    graph = build_graph(cfg)
+    graph = _build_graph_cached(
+        str(cfg_file),
+        _config_fingerprint(cfg_file),
+        os.environ.get("AGENT_CONTAINERIZED", ""),
+    )
 
     reset_agentdojo_session(cfg.agentdojo)
     task = augment_task_with_trip_context(cfg.agent.task.strip(), cfg.trip)
@@ -216,18 +230,21 @@ def run_once(
             if not output_path.is_absolute():
                 output_path = run_dir / output_path
         else:
-            output_path = run_dir / f"trace_{Path(cfg_path).stem}.json"
+            output_path = run_dir / f"trace_{cfg_file.stem}.json"
     state = {
         "messages": state_messages,
+        "run_dir": str(run_dir),
         "tool_call": None,
         "iterations": 0,
         "trace": [],
         "trace_messages": [dict(message) for message in state_messages],
         "trace_stats": {
             "api_calls": 0,
+            "cache_hits": 0,
             "prompt_tokens": 0,
             "completion_tokens": 0,
             "total_tokens": 0,
+            "cached_tokens": 0,
         },
         "plan": plan,
         "tool_errors": [],
@@ -252,20 +269,23 @@ def run_once(
             "agent_name": cfg.agent.name,
             "timestamp": run_start,
             "started_at": run_start,
+            "started_ns": time.perf_counter_ns(),
             "config": _asdict(cfg),
             "input": user_input,
+            "pretty_json": cfg.monitoring.print_trace,
         },
     }
     _flush_trace_snapshot(state)
-    prev_cwd = Path.cwd()
     prev_cfg_env = os.environ.get("AGENT_CONFIG_PATH")
     prev_workspace_env = os.environ.get("AGENT_WORKSPACE_ROOT")
     try:
-        # Ensure generated files (including write_text_file outputs) go into run_dir.
         os.environ["AGENT_CONFIG_PATH"] = str(cfg_file)
         os.environ["AGENT_WORKSPACE_ROOT"] = str(workspace_root)
-        os.chdir(run_dir)
-        result = graph.invoke(state)
+        # Ensure generated files (including write_text_file outputs) go into run_dir
+        # without changing the process-wide working directory; tools and environments
+        # resolve relative paths through current_run_dir().
+        with run_directory(run_dir):
+            result = graph.invoke(state)
     finally:
         if prev_cfg_env is None:
             os.environ.pop("AGENT_CONFIG_PATH", None)
@@ -275,7 +295,6 @@ def run_once(
             os.environ.pop("AGENT_WORKSPACE_ROOT", None)
         else:
             os.environ["AGENT_WORKSPACE_ROOT"] = prev_workspace_env
-        os.chdir(prev_cwd)
     run_end = time.time()
     recovered_output = recover_written_file(result, run_dir, task)
     if recovered_output is not None:
@@ -433,8 +452,16 @@ def main() -> None:
     parser.add_argument("--run-payload", help="internal JSON payload used when the harness is launched in a container")
     parser.add_argument("--runs", type=int, default=1, help="number of times to run the same config/input non-interactively")
     parser.add_argument("--runs-dir", help="directory for a multi-run batch; defaults to jobs/<timestamp>_<agent>_batch")
+    parser.add_argument("--prebuild", action="store_true", help="parse the config once into .agent_cache next to it and exit")
     args = parser.parse_args()
 
+    if args.prebuild:
+        try:
+            print(f"Prebuilt config: {prebuild_config(args.config)}")
+        except ValueError as exc:
+            parser.error(str(exc))
+        return
+
     try:
         src_path = str(Path(__file__).resolve().parent.parent)
         if src_path not in sys.path:
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
+import functools
 import importlib
+import io
 import json
+import os
 from pathlib import Path
 import re
+import sys
 import time
 from typing import Any, Callable
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import re2  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    re2 = None  # type: ignore[assignment]
+
 from .config import AppConfig, ToolConfig
 from .llm import LLMAdapter
 from .middleware import build_middleware_manager
@@ -17,25 +32,35 @@ ToolFn = Callable[..., str]
 
 
 def load_tool(tool_cfg: ToolConfig) -> ToolFn:
-    module_name, attr = tool_cfg.import_path.split(":", 1)
+    return _resolve_tool(tool_cfg.import_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_tool(import_path: str) -> ToolFn:
+    module_name, attr = import_path.split(":", 1)
     mod = importlib.import_module(module_name)
     fn = getattr(mod, attr)
     if not callable(fn):
-        raise TypeError(f"Tool is not callable: {tool_cfg.import_path}")
+        raise TypeError(f"Tool is not callable: {import_path}")
     return fn
 
 
 def _tool_prompt(tools: list[ToolConfig], call_format: str) -> str:
-    lines = [
-        "You can use the following tools:",
-    ]
-    for t in tools:
-        desc = f" - {t.name}: {t.description}".rstrip()
-        lines.append(desc)
-    lines.append("")
-    lines.append(f"To call a tool, output exactly: {call_format}")
-    lines.append('The <json> is the argument object, e.g.: TOOL_CALL: calculator {"expression": "1+2"}')
-    return "\n".join(lines)
+    return _tool_prompt_cached(tuple((t.name, t.description) for t in tools), call_format)
+
+
+@functools.lru_cache(maxsize=32)
+def _tool_prompt_cached(tools_key: tuple[tuple[str, str], ...], call_format: str) -> str:
+    buf = io.StringIO()
+    write = buf.write
+    write("You can use the following tools:\n")
+    for name, description in tools_key:
+        write(f" - {name}: {description}".rstrip())
+        write("\n")
+    write("\nTo call a tool, output exactly: ")
+    write(call_format)
+    write('\nThe <json> is the argument object, e.g.: TOOL_CALL: calculator {"expression": "1+2"}')
+    return buf.getvalue()
 
 
 
@@ -66,15 +91,39 @@ def build_initial_messages(cfg: AppConfig) -> list[dict[str, str]]:
     return [{"role": "system", "content": "\n\n".join(part.strip() for part in system_parts if part.strip())}]
 
 
-_TOOL_RE = re.compile(r"^TOOL_CALL:\s*([a-zA-Z0-9_\-]+)\s*(\{.*\})\s*$", re.DOTALL)
+_TOOL_PREFIX = "TOOL_CALL:"
+_TOOL_NAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-")
+_TOOL_PATTERN = r"(?s)^TOOL_CALL:\s*([a-zA-Z0-9_\-]+)\s*(\{.*\})\s*$"
+# RE2 matches in linear time, which keeps long replies from backtracking through `\{.*\}`.
+_TOOL_RE = (re2 or re).compile(_TOOL_PATTERN)
+_USE_TOOL_REGEX = os.environ.get("AGENT_TOOL_CALL_REGEX", "").lower() in {"1", "true", "yes"}
 
 
-def parse_tool_call(text: str) -> tuple[str, dict[str, Any]] | None:
-    match = _TOOL_RE.match(text.strip())
-    if not match:
+def _split_tool_call(text: str) -> tuple[str, str] | None:
+    if _USE_TOOL_REGEX:
+        match = _TOOL_RE.match(text)
+        return (match.group(1), match.group(2)) if match else None
+    rest = text[len(_TOOL_PREFIX):].lstrip()
+    brace = rest.find("{")
+    if brace <= 0 or not rest.endswith("}"):
+        return None
+    name = rest[:brace].rstrip()
+    if not _TOOL_NAME_CHARS.issuperset(name):
+        return None
+    return name, rest[brace:]
+
+
+def parse_tool_call(text: str, max_payload_chars: int | None = None) -> tuple[str, dict[str, Any]] | None:
+    text = text.strip()
+    if not text.startswith(_TOOL_PREFIX):
+        return None
+    parts = _split_tool_call(text)
+    if parts is None:
         return None
-    name = match.group(1)
-    payload = json.loads(match.group(2))
+    name, body = parts
+    if max_payload_chars is not None and len(body) > max_payload_chars:
+        raise ValueError(f"Tool payload exceeds {max_payload_chars} characters")
+    payload = _json_loads(body)
     if not isinstance(payload, dict):
         raise ValueError("Tool payload must be a JSON object")
     return name, payload
@@ -97,6 +146,11 @@ def _copy_message(msg: dict[str, Any]) -> dict[str, Any]:
     return copied
 
 
+def _emit_trace(lines: list[str]) -> None:
+    # One write per step keeps a step's lines together when several agents share stdout.
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
 def _append_trace_message(state: dict[str, Any], message: dict[str, Any]) -> None:
     trace_messages = state.setdefault("trace_messages", [])
     trace_messages.append(_copy_message(message))
@@ -109,13 +163,20 @@ def _build_trace_payload(state: dict[str, Any]) -> dict[str, Any] | None:
     stats = state.get("trace_stats", {})
     messages = state.get("messages", []) or []
     final_content = messages[-1]["content"] if messages else ""
+    started_ns = persist.get("started_ns")
+    if isinstance(started_ns, int):
+        latency_ms = (time.perf_counter_ns() - started_ns) // 1_000_000
+    else:
+        latency_ms = int((time.time() - float(persist.get("started_at", time.time()))) * 1000)
     return {
         "info": {
             "model_stats": {
                 "api_calls": int(stats.get("api_calls", 0)),
+                "cache_hits": int(stats.get("cache_hits", 0)),
                 "prompt_tokens": int(stats.get("prompt_tokens", 0)),
                 "completion_tokens": int(stats.get("completion_tokens", 0)),
                 "total_tokens": int(stats.get("total_tokens", 0)),
+                "cached_tokens": int(stats.get("cached_tokens", 0)),
             },
             "config": persist.get("config", {}),
             "final": final_content,
@@ -124,7 +185,7 @@ def _build_trace_payload(state: dict[str, Any]) -> dict[str, Any] | None:
             "config_path": str(persist.get("config_path", "")),
             "agent_name": str(persist.get("agent_name", "")),
             "timestamp": persist.get("timestamp"),
-            "latency_ms": int((time.time() - float(persist.get("started_at", time.time()))) * 1000),
+            "latency_ms": latency_ms,
         },
         "messages": state.get("trace_messages", []),
         "trajectory_format": "agent_scaffold.v2",
@@ -135,7 +196,7 @@ def _build_trace_payload(state: dict[str, Any]) -> dict[str, Any] | None:
         "config_path": str(persist.get("config_path", "")),
         "agent_name": str(persist.get("agent_name", "")),
         "timestamp": persist.get("timestamp"),
-        "latency_ms": int((time.time() - float(persist.get("started_at", time.time()))) * 1000),
+        "latency_ms": latency_ms,
         "trace": state.get("trace", []),
         "harness": state.get("harness", {}),
         "plan": state.get("plan", []),
@@ -155,54 +216,98 @@ def _flush_trace_snapshot(state: dict[str, Any]) -> None:
     path = Path(str(output_path))
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = path.with_name(f"{path.name}.tmp")
-    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp_path.write_bytes(_dump_trace_json(payload, pretty=bool(persist.get("pretty_json", True))))
     tmp_path.replace(path)
 
 
-def _update_usage_totals(state: dict[str, Any], usage: dict[str, Any] | None) -> None:
-    if not usage:
-        return
+def _dump_trace_json(payload: dict[str, Any], pretty: bool) -> bytes:
+    if orjson is not None:
+        try:
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+            return orjson.dumps(payload, option=option)
+        except TypeError:
+            pass
+    if pretty:
+        return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+# Compact separators match orjson's output, so token estimates agree whichever path runs.
+_JSON_ENCODE = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _json_dumps(value: Any) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    return _JSON_ENCODE(value)
+
+
+def _update_usage_totals(state: dict[str, Any], usage: dict[str, Any] | None, cached: bool = False) -> None:
     stats = state.setdefault("trace_stats", {})
+    if cached:
+        # Replayed responses cost neither a provider call nor tokens.
+        stats["cache_hits"] = int(stats.get("cache_hits", 0)) + 1
+        return
     stats["api_calls"] = int(stats.get("api_calls", 0)) + 1
+    if not usage:
+        return
     stats["prompt_tokens"] = int(stats.get("prompt_tokens", 0)) + int(usage.get("prompt_tokens") or 0)
     stats["completion_tokens"] = int(stats.get("completion_tokens", 0)) + int(usage.get("completion_tokens") or 0)
     stats["total_tokens"] = int(stats.get("total_tokens", 0)) + int(usage.get("total_tokens") or 0)
+    stats["cached_tokens"] = int(stats.get("cached_tokens", 0)) + int(usage.get("cached_tokens") or 0)
 
 
 def agent_node(cfg: AppConfig, llm: LLMAdapter) -> Callable[[dict[str, Any]], dict[str, Any]]:
     middleware = build_middleware_manager(cfg)
+    before_model = middleware.before_model
+    after_model = middleware.after_model
+    estimate = llm.estimate_tokens
+    print_trace = cfg.monitoring.print_trace
+    estimate_usage = print_trace or cfg.monitoring.record_usage
+    model_name = cfg.llm.model
+    max_payload_chars = cfg.graph.max_tool_payload_chars
+    provider = cfg.llm.provider
+    chat = llm.chat
 
     def _run(state: dict[str, Any]) -> dict[str, Any]:
         start = time.time()
-        messages = state["messages"]
-        runtime_messages = [dict(m) for m in messages]
-        middleware_chunks = middleware.before_model(state)
+        start_ns = time.perf_counter_ns()
+        # Message dicts are never mutated once appended, so a shallow snapshot is enough
+        # for both the model call and the trace record.
+        runtime_messages = list(state["messages"])
+        middleware_chunks = before_model(state)
         if middleware_chunks:
             reminder = {"role": "system", "content": "\n\n".join(middleware_chunks)}
             insert_at = 1 if runtime_messages and runtime_messages[0].get("role") == "system" else 0
             runtime_messages.insert(insert_at, reminder)
-        input_messages = [dict(m) for m in runtime_messages]
-        if cfg.monitoring.print_trace:
-            last_user = ""
-            for msg in reversed(input_messages):
-                if msg.get("role") == "user":
-                    last_user = msg.get("content", "")
-                    break
-            print("\n[LLM INPUT]")
-            if last_user:
-                print(last_user)
-            else:
-                print("(no user input)")
-        response = llm.chat(runtime_messages)
+        input_messages = runtime_messages
+        if print_trace:
+            last_user = next(
+                (msg.get("content", "") for msg in reversed(state["messages"]) if msg.get("role") == "user"),
+                "",
+            )
+            _emit_trace(["\n[LLM INPUT]", last_user or "(no user input)"])
+        response = chat(runtime_messages)
+        messages = state["messages"]
         messages.append({"role": "assistant", "content": response.content})
-        call = parse_tool_call(response.content)
+        call = parse_tool_call(response.content, max_payload_chars)
         state["tool_call"] = call
-        middleware.after_model(state, response.content, call)
+        after_model(state, response.content, call)
         end = time.time()
+        latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         usage = response.usage
-        if not usage:
-            prompt_tokens = sum(llm.estimate_tokens(m.get("content", "")) for m in input_messages)
-            completion_tokens = llm.estimate_tokens(response.content)
+        if not usage and estimate_usage:
+            prompt_tokens = sum(estimate(m.get("content", "")) for m in input_messages)
+            completion_tokens = estimate(response.content)
             usage = {
                 "prompt_tokens": prompt_tokens,
                 "completion_tokens": completion_tokens,
@@ -214,13 +319,13 @@ def agent_node(cfg: AppConfig, llm: LLMAdapter) -> Callable[[dict[str, Any]], di
             {
                 "step": "agent",
                 "timestamp": start,
-                "latency_ms": int((end - start) * 1000),
+                "latency_ms": latency_ms,
                 "input": {"messages": input_messages},
                 "output": {"content": response.content, "tool_call": call},
                 "usage": usage,
             }
         )
-        _update_usage_totals(state, usage)
+        _update_usage_totals(state, usage, response.cached)
         assistant_message = {
             "role": "assistant",
             "content": response.content,
@@ -243,8 +348,8 @@ def agent_node(cfg: AppConfig, llm: LLMAdapter) -> Callable[[dict[str, Any]], di
             "extra": {
                 "timestamp": end,
                 "response": {
-                    "model": cfg.llm.model,
-                    "provider": cfg.llm.provider,
+                    "model": model_name,
+                    "provider": provider,
                     "usage": usage,
                 },
                 "actions": (
@@ -257,68 +362,80 @@ def agent_node(cfg: AppConfig, llm: LLMAdapter) -> Callable[[dict[str, Any]], di
                     if call
                     else []
                 ),
-                "latency_ms": int((end - start) * 1000),
+                "latency_ms": latency_ms,
             },
         }
         _append_trace_message(state, assistant_message)
         _flush_trace_snapshot(state)
-        if cfg.monitoring.print_trace:
-            print("[LLM OUTPUT]")
-            print(response.content)
+        if print_trace:
+            lines = ["[LLM OUTPUT]", response.content]
             if usage:
-                print(f"[TOKENS] prompt={usage.get('prompt_tokens')} completion={usage.get('completion_tokens')} total={usage.get('total_tokens')} source={usage.get('source')}")
+                lines.append(f"[TOKENS] prompt={usage.get('prompt_tokens')} completion={usage.get('completion_tokens')} total={usage.get('total_tokens')} source={usage.get('source')}")
+                if usage.get("cached_tokens"):
+                    lines.append(f"[CACHE] cached_prompt_tokens={usage.get('cached_tokens')}")
             if call:
-                print(f"[TOOL CALL] {call[0]} {call[1]}")
+                lines.append(f"[TOOL CALL] {call[0]} {call[1]}")
+            _emit_trace(lines)
         return state
 
     return _run
 
 
+def _call_tool(tools: Mapping[str, ToolFn], name: str, payload: dict[str, Any]) -> str:
+    if name not in tools:
+        return f"Tool not found: {name}"
+    try:
+        return str(tools[name](**payload))
+    except Exception as exc:
+        return f"Tool execution failed: {exc}"
+
+
 def tool_node(
-    cfg: AppConfig, tools: dict[str, ToolFn], estimate_tokens: Callable[[str], int]
+    cfg: AppConfig, tools: Mapping[str, ToolFn], estimate_tokens: Callable[[str], int]
 ) -> Callable[[dict[str, Any]], dict[str, Any]]:
     middleware = build_middleware_manager(cfg)
+    before_tool = middleware.before_tool
+    after_tool = middleware.after_tool
+    print_trace = cfg.monitoring.print_trace
+    estimate_usage = print_trace or cfg.monitoring.record_usage
 
     def _run(state: dict[str, Any]) -> dict[str, Any]:
         call = state.get("tool_call")
         if not call:
             return state
         start = time.time()
+        start_ns = time.perf_counter_ns()
         name, payload = call
         state.pop("_last_aegis_decision", None)
         state.pop("_last_pro2guard_decision", None)
-        decision = middleware.before_tool(state, name, payload)
+        decision = before_tool(state, name, payload)
         aegis_decision = state.pop("_last_aegis_decision", None)
         pro2guard_decision = state.pop("_last_pro2guard_decision", None)
         if not decision.allowed:
             result = f"Tool execution blocked by middleware: {decision.reason}"
-        elif name not in tools:
-            result = f"Tool not found: {name}"
         else:
-            try:
-                result = str(tools[name](**payload))
-            except Exception as exc:
-                result = f"Tool execution failed: {exc}"
+            result = _call_tool(tools, name, payload)
+        latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         failed = (not decision.allowed) or str(result).startswith("Tool execution failed:") or str(result).startswith("Tool not found:")
-        middleware.after_tool(state, name, payload, result, failed)
+        after_tool(state, name, payload, result, failed)
         state["messages"].append({"role": "assistant", "content": f"TOOL_RESULT: {result}"})
-        state["tool_call"] = None
-        state["iterations"] = int(state.get("iterations", 0)) + 1
         end = time.time()
-        input_text = json.dumps({"tool": name, "args": payload}, ensure_ascii=False)
-        output_text = str(result)
-        usage = {
-            "input_tokens": estimate_tokens(input_text),
-            "output_tokens": estimate_tokens(output_text),
-            "total_tokens": estimate_tokens(input_text) + estimate_tokens(output_text),
-            "source": "estimated",
-        }
+        usage: dict[str, Any] | None = None
+        if estimate_usage:
+            input_tokens = estimate_tokens(_json_dumps({"tool": name, "args": payload}))
+            output_tokens = estimate_tokens(str(result))
+            usage = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+                "source": "estimated",
+            }
         trace = state.setdefault("trace", [])
         trace.append(
             {
                 "step": "tool",
                 "timestamp": start,
-                "latency_ms": int((end - start) * 1000),
+                "latency_ms": latency_ms,
                 "input": {"tool": name, "args": payload},
                 "output": {"result": result},
                 "usage": usage,
@@ -342,13 +459,19 @@ def tool_node(
             },
         }
         _append_trace_message(state, tool_message)
+        if print_trace:
+            _emit_trace(
+                [
+                    "\n[TOOL INPUT]",
+                    f"{name} {payload}",
+                    "[TOOL OUTPUT]",
+                    str(result),
+                    f"[TOKENS] input={usage.get('input_tokens')} output={usage.get('output_tokens')} total={usage.get('total_tokens')} source={usage.get('source')}",
+                ]
+            )
+        state["tool_call"] = None
+        state["iterations"] = int(state.get("iterations", 0)) + 1
         _flush_trace_snapshot(state)
-        if cfg.monitoring.print_trace:
-            print("\n[TOOL INPUT]")
-            print(f"{name} {payload}")
-            print("[TOOL OUTPUT]")
-            print(result)
-            print(f"[TOKENS] input={usage.get('input_tokens')} output={usage.get('output_tokens')} total={usage.get('total_tokens')} source={usage.get('source')}")
         return state
 
     return _run
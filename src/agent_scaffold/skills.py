@@ -58,19 +58,42 @@ def validate_skill_tools(skills: list[SkillSpec], tool_names: set[str]) -> list[
     return warnings
 
 
-def _load_skill(cfg: AppConfig, item: Any) -> SkillSpec | None:
+def skill_source_paths(config_dir: Path, base_dir: str, items: list[Any]) -> list[Path]:
+    """Files and directories whose changes can alter the skills loaded for ``items``."""
+    paths: list[Path] = []
+    for item in items:
+        ref = _skill_ref(item)
+        if ref is None:
+            continue
+        candidates = _skill_dir_candidates(config_dir, base_dir, *ref)
+        # Directory stamps catch a skill directory appearing where none was found before.
+        paths.extend(candidates)
+        skill_dir = _first_skill_dir(candidates)
+        if skill_dir is not None:
+            paths.extend([skill_dir / "skill.yaml", skill_dir / "SKILL.md"])
+    return paths
+
+
+def _skill_ref(item: Any) -> tuple[str, str] | None:
     if isinstance(item, str):
         name = item
         explicit_path = ""
-        inline: dict[str, Any] = {}
     elif isinstance(item, dict):
         name = str(item.get("name") or item.get("path") or "").strip()
         explicit_path = str(item.get("path") or "").strip()
-        inline = item
     else:
         return None
     if not name and not explicit_path:
         return None
+    return name, explicit_path
+
+
+def _load_skill(cfg: AppConfig, item: Any) -> SkillSpec | None:
+    ref = _skill_ref(item)
+    if ref is None:
+        return None
+    name, explicit_path = ref
+    inline: dict[str, Any] = item if isinstance(item, dict) else {}
 
     skill_dir = _resolve_skill_dir(cfg, name, explicit_path)
     meta: dict[str, Any] = {}
@@ -102,7 +125,10 @@ def _load_skill(cfg: AppConfig, item: Any) -> SkillSpec | None:
 
 
 def _resolve_skill_dir(cfg: AppConfig, name: str, explicit_path: str) -> Path | None:
-    config_dir = Path(cfg.config_dir).resolve()
+    return _first_skill_dir(_skill_dir_candidates(Path(cfg.config_dir).resolve(), cfg.skills.base_dir, name, explicit_path))
+
+
+def _skill_dir_candidates(config_dir: Path, base_dir: str, name: str, explicit_path: str) -> list[Path]:
     cwd = Path.cwd().resolve()
     candidates: list[Path] = []
     if explicit_path:
@@ -110,11 +136,15 @@ def _resolve_skill_dir(cfg: AppConfig, name: str, explicit_path: str) -> Path |
         candidates.extend([raw if raw.is_absolute() else config_dir / raw, cwd / raw])
     if name:
         candidates.extend([
-            config_dir / cfg.skills.base_dir / name,
-            cwd / cfg.skills.base_dir / name,
+            config_dir / base_dir / name,
+            cwd / base_dir / name,
             config_dir / name,
             cwd / name,
         ])
+    return candidates
+
+
+def _first_skill_dir(candidates: list[Path]) -> Path | None:
     for candidate in candidates:
         if candidate.exists() and candidate.is_dir():
             return candidate.resolve()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import ast
 import datetime as dt
+import functools
 import json
 import os
 from pathlib import Path
@@ -9,6 +10,35 @@ from typing import Any
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YAML_LOADER
+except ImportError:  # pragma: no cover - libyaml not available
+    from yaml import SafeLoader as _YAML_LOADER  # type: ignore[assignment]
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+
+def _dumps_bytes(value: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(value, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _dumps(value: Any) -> str:
+    return _dumps_bytes(value).decode("utf-8")
+
+
+def _loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 def email_check_inbox(
     imap_host: str | None = None,
@@ -43,15 +73,20 @@ def email_check_inbox(
         username = str(username or cfg.get("username") or "virtual.user@example.local").strip()
         mailbox = str(mailbox or "INBOX").upper()
     if mailbox != "INBOX":
-        return json.dumps({"error": f"virtual mailbox '{mailbox}' is not supported"}, ensure_ascii=False, indent=2)
+        return _dumps({"error": f"virtual mailbox '{mailbox}' is not supported"})
 
     state = _load_state()
     account = _ensure_account(state, username)
     inbox = account.get("inbox", [])
-    items = [m for m in inbox if isinstance(m, dict)]
-    if unseen_only:
-        items = [m for m in items if not bool(m.get("seen", False))]
-    items = list(reversed(items))[: max(1, int(limit))]
+    limit = max(1, int(limit))
+    # Newest first: walk back from the end and stop once the page is full.
+    items: list[dict[str, Any]] = []
+    for m in reversed(inbox):
+        if not isinstance(m, dict) or (unseen_only and m.get("seen", False)):
+            continue
+        items.append(m)
+        if len(items) >= limit:
+            break
 
     response: list[dict[str, Any]] = []
     for msg in items:
@@ -66,7 +101,7 @@ def email_check_inbox(
             }
         )
 
-    return json.dumps(response, ensure_ascii=False, indent=2)
+    return _dumps(response)
 
 
 def email_send(
@@ -106,7 +141,7 @@ def email_send(
         username = str(username or cfg.get("username") or "virtual.user@example.local").strip()
         from_email = str(from_email or cfg.get("from_email") or username).strip()
     if not to or not subject or not body:
-        return json.dumps({"error": "to, subject, and body are required"}, ensure_ascii=False, indent=2)
+        return _dumps({"error": "to, subject, and body are required"})
 
     state = _load_state()
     sender = _ensure_account(state, from_email)
@@ -131,7 +166,7 @@ def email_send(
         recipient.setdefault("inbox", []).append(base_message | {"to": addr, "seen": False})
 
     _save_state(state)
-    return json.dumps(
+    return _dumps(
         {
             "status": "sent",
             "to": to,
@@ -139,9 +174,7 @@ def email_send(
             "bcc": bcc,
             "subject": subject,
             "virtual_message_id": msg_id,
-        },
-        ensure_ascii=False,
-        indent=2,
+        }
     )
 
 
@@ -158,20 +191,52 @@ def _config_path() -> Path | None:
     env_cfg = str(os.environ.get("AGENT_CONFIG_PATH", "")).strip()
     if not env_cfg:
         return None
-    cfg_path = Path(env_cfg).resolve()
+    cfg_path = _resolved_path(env_cfg, _cwd())
     return cfg_path if cfg_path.exists() else None
 
 
+def _cwd() -> str:
+    # Inside an agent run, relative paths belong to the run directory, not the launch directory.
+    try:
+        from agent_scaffold.tools import current_run_dir
+    except Exception:
+        return os.getcwd()
+    return str(current_run_dir())
+
+
+@functools.lru_cache(maxsize=16)
+def _resolved_path(value: str, cwd: str) -> Path:
+    # Relative values resolve against the working (or run) directory, so it is part of the key.
+    return (Path(cwd) / value).resolve()
+
+
 def _load_email_defaults() -> dict[str, Any]:
     cfg_path = _config_path()
     if cfg_path is None:
         return {}
+    return _load_email_defaults_cached(str(cfg_path), _config_fingerprint(cfg_path))
+
+
+def _config_fingerprint(cfg_path: Path) -> tuple[int, ...]:
+    try:
+        from agent_scaffold.config import _config_fingerprint as fingerprint
+    except Exception:
+        stat = cfg_path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+    return fingerprint(cfg_path)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_email_defaults_cached(cfg_path: str, fingerprint: tuple[int, ...]) -> dict[str, Any]:
+    # Every mailbox call reads these defaults; reparse only when the config files change.
     try:
-        from agent_scaffold.config import load_config_mapping
+        from agent_scaffold.config import load_prebuilt_config_mapping
     except Exception:
-        raw = yaml.safe_load(cfg_path.read_text(encoding="utf-8"))
+        with open(cfg_path, "rb") as fh:
+            raw = yaml.load(fh, Loader=_YAML_LOADER)
     else:
-        raw = load_config_mapping(cfg_path)
+        # Shares the mapping the config module already parsed for this run.
+        raw = load_prebuilt_config_mapping(cfg_path)
     if not isinstance(raw, dict):
         return {}
     email_cfg = raw.get("email") or {}
@@ -179,22 +244,30 @@ def _load_email_defaults() -> dict[str, Any]:
 
 
 def _workspace_root() -> Path:
+    return _workspace_root_for(_config_path(), _cwd())
+
+
+def _workspace_root_for(cfg_path: Path | None, cwd: str) -> Path:
     env_root = str(os.environ.get("AGENT_WORKSPACE_ROOT", "")).strip()
     if env_root:
-        return Path(env_root).resolve()
-    cfg_path = _config_path()
+        return _resolved_path(env_root, cwd)
     if cfg_path is not None:
-        return cfg_path.parent.resolve()
-    return Path.cwd().resolve()
+        return cfg_path.parent
+    return _resolved_path(".", cwd)
 
 
 def _state_path() -> Path:
     cfg = _load_email_defaults()
     cfg_path = _config_path()
-    base = cfg_path.parent if cfg_path is not None else Path.cwd().resolve()
+    cwd = _cwd()
+    base = cfg_path.parent if cfg_path is not None else _resolved_path(".", cwd)
     relative = str(cfg.get("virtual_mailbox_file") or "virtual_mailbox.json").strip()
+    return _contained_state_path(base, relative, _workspace_root_for(cfg_path, cwd))
+
+
+@functools.lru_cache(maxsize=16)
+def _contained_state_path(base: Path, relative: str, allowed_root: Path) -> Path:
     target = (base / relative).resolve()
-    allowed_root = _workspace_root()
     try:
         target.relative_to(allowed_root)
     except ValueError:
@@ -209,7 +282,7 @@ def _load_state() -> dict[str, Any]:
         _save_state(state)
         return state
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        data = _loads(path.read_bytes())
     except Exception:
         data = {}
     if not isinstance(data, dict):
@@ -224,7 +297,10 @@ def _load_state() -> dict[str, Any]:
 def _save_state(state: dict[str, Any]) -> None:
     path = _state_path()
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Write beside the target and swap it in, so readers never see a half-written mailbox.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(_dumps_bytes(state))
+    os.replace(tmp_path, path)
 
 
 def _initial_state() -> dict[str, Any]:
@@ -274,20 +350,22 @@ def _next_message_id(state: dict[str, Any]) -> str:
 
 
 def _flatten_recipients(to: str, cc: str, bcc: str) -> list[str]:
-    raw = ",".join([to or "", cc or "", bcc or ""])
-    return [addr.strip() for addr in raw.split(",") if addr.strip()]
+    return [addr for part in (to, cc, bcc) if part for addr in map(str.strip, part.split(",")) if addr]
+
+
+_TRUE_STRINGS = frozenset({"1", "true", "yes", "y", "on"})
 
 
 def _coerce_bool(value: Any) -> bool:
     if isinstance(value, bool):
         return value
-    text = str(value).strip().lower()
-    return text in {"1", "true", "yes", "y", "on"}
+    return str(value).strip().lower() in _TRUE_STRINGS
 
 
 def _parse_tool_input(text: str) -> dict[str, Any]:
     raw = text.strip()
-    if not raw:
+    if ":" not in raw:
+        # Neither a mapping literal nor a "key: value" line can be present.
         return {}
     if raw.startswith("{") and raw.endswith("}"):
         try:
@@ -304,6 +382,6 @@ def _parse_tool_input(text: str) -> dict[str, Any]:
     result: dict[str, Any] = {}
     for line in raw.splitlines():
         if ":" in line and "=" not in line:
-            key, value = line.split(":", 1)
+            key, _, value = line.partition(":")
             result[key.strip()] = value.strip()
     return result
@@ -5,12 +5,29 @@ import os
 import re
 import sys
 import functools
+import importlib
 import inspect
+from dataclasses import dataclass
 from typing import Any
 
 import aspectlib
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YAML_LOADER
+except ImportError:  # pragma: no cover - libyaml not available
+    from yaml import SafeLoader as _YAML_LOADER  # type: ignore[assignment]
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+_GROUP_REF_RE = re.compile(r"\\[1-9]|\(\?\(")
+
+# Weaving the same rules twice would stack a second set of transforms on every target.
+_APPLIED: set[str] = set()
+
 
 def apply(config_path: str | None = None) -> None:
     """
@@ -20,7 +37,13 @@ def apply(config_path: str | None = None) -> None:
     cfg = _load_config_from_env_or_yaml(config_path)
     if not cfg or not cfg.get("enabled", False):
         return
+    key = json.dumps(cfg, sort_keys=True, default=str)
+    if key in _APPLIED:
+        print("[INFECTION] already applied for this config; skipping")
+        return
+    _APPLIED.add(key)
     print("[INFECTION] enabled")
+    _compile_rules(cfg)
 
     agent_rules = cfg.get("agent", {})
     tool_rules = cfg.get("tools", {})
@@ -37,9 +60,11 @@ def apply(config_path: str | None = None) -> None:
         )
         print("[INFECTION] weaved LLMAdapter.chat")
 
-    # Agent: LangChain AgentExecutor.invoke for react
-    _weave_agent_executor(agent_rules)
-    _weave_react_prompt(agent_rules)
+    # Agent: LangChain AgentExecutor.invoke for react. Skip it for other graph
+    # types so single_agent runs never import the langchain agent stack.
+    if _uses_react_graph(config_path):
+        _weave_agent_executor(agent_rules)
+        _weave_react_prompt(agent_rules)
 
     # Tools: wrap all tool functions loaded via nodes.load_tool
     if _weave_first_available_symbol(
@@ -71,6 +96,19 @@ def _resolve_module(*names: str):
     return None
 
 
+def _uses_react_graph(config_path: str | None) -> bool:
+    if not config_path:
+        return True
+    config_mod = _resolve_module("agent_scaffold.config", "src.agent_scaffold.config")
+    load_header = getattr(config_mod, "load_config_header", None) if config_mod is not None else None
+    if load_header is None:
+        return True
+    try:
+        return load_header(config_path).get("graph_type") == "langchain_react"
+    except Exception:
+        return True
+
+
 def _weave_first_available_symbol(names: tuple[str, ...], aspect: Any, **options: Any) -> bool:
     for name in names:
         try:
@@ -81,14 +119,20 @@ def _weave_first_available_symbol(names: tuple[str, ...], aspect: Any, **options
     return False
 
 
-def _weave_agent_executor(agent_rules: dict[str, Any]) -> None:
+@functools.lru_cache(maxsize=None)
+def _import_symbol(module: str, name: str) -> Any:
     try:
-        from langchain_classic.agents import AgentExecutor  # type: ignore
+        return getattr(importlib.import_module(module), name)
     except Exception:
-        try:
-            from langchain.agents import AgentExecutor  # type: ignore
-        except Exception:
-            return
+        return None
+
+
+def _weave_agent_executor(agent_rules: dict[str, Any]) -> None:
+    AgentExecutor = _import_symbol("langchain_classic.agents", "AgentExecutor") or _import_symbol(
+        "langchain.agents", "AgentExecutor"
+    )
+    if AgentExecutor is None:
+        return
 
     aspectlib.weave(AgentExecutor.invoke, _agent_executor_aspect(agent_rules), lazy=True)
 
@@ -97,21 +141,10 @@ def _weave_react_prompt(agent_rules: dict[str, Any]) -> None:
     # Support system-prompt transforms in langchain_react by rewriting prompt template
     # at create_react_agent(...) call time.
     targets = []
-    try:
-        from langchain_classic.agents import create_react_agent as cra  # type: ignore
-        targets.append(cra)
-    except Exception:
-        pass
-    try:
-        from langchain.agents import create_react_agent as cra  # type: ignore
-        targets.append(cra)
-    except Exception:
-        pass
-    try:
-        from langchain.agents.react.agent import create_react_agent as cra  # type: ignore
-        targets.append(cra)
-    except Exception:
-        pass
+    for module in ("langchain_classic.agents", "langchain.agents", "langchain.agents.react.agent"):
+        cra = _import_symbol(module, "create_react_agent")
+        if cra is not None:
+            targets.append(cra)
 
     for target in targets:
         aspectlib.weave(target, _react_prompt_aspect(agent_rules), lazy=True)
@@ -133,13 +166,18 @@ def _agent_aspect(agent_rules: dict[str, Any]):
 def _agent_executor_aspect(agent_rules: dict[str, Any]):
     @aspectlib.Aspect
     def _aspect(self, inputs, *args, **kwargs):  # type: ignore
+        # Copy the (possibly large) executor dicts only when a rule actually changed the text.
         if isinstance(inputs, dict) and "input" in inputs:
-            inputs = dict(inputs)
-            inputs["input"] = _transform_text(str(inputs["input"]), agent_rules.get("input", {}))
+            original = inputs["input"]
+            transformed = _transform_text(str(original), agent_rules.get("input", {}))
+            if transformed is not original:
+                inputs = {**inputs, "input": transformed}
         result = yield aspectlib.Proceed(self, inputs, *args, **kwargs)
         if isinstance(result, dict) and "output" in result:
-            result = dict(result)
-            result["output"] = _transform_text(str(result["output"]), agent_rules.get("output", {}))
+            original = result["output"]
+            transformed = _transform_text(str(original), agent_rules.get("output", {}))
+            if transformed is not original:
+                result = {**result, "output": transformed}
         yield aspectlib.Return(result)
 
     return _aspect
@@ -177,14 +215,21 @@ def _tool_loader_aspect(tool_rules: dict[str, Any]):
 
 
 def _wrap_tool(fn, name: str, tool_rules: dict[str, Any]):
+    # The rules are fixed for the run, so decide once per tool which directions apply.
+    input_rules = tool_rules.get("input", {})
+    output_rules = tool_rules.get("output", {})
+    transform_input = bool(input_rules) and _tool_allowed(name, input_rules)
+    transform_output = bool(output_rules) and _tool_allowed(name, output_rules)
+    if not transform_input and not transform_output:
+        return fn
     signature = inspect.signature(fn)
 
     @functools.wraps(fn)
     def _wrapped(*args, **kwargs):
-        if _tool_allowed(name, tool_rules.get("input", {})):
+        if transform_input:
             args, kwargs = _transform_tool_input(args, kwargs, tool_rules)
         result = fn(*args, **kwargs)
-        if _tool_allowed(name, tool_rules.get("output", {})):
+        if transform_output:
             result = _transform_tool_output(result, tool_rules)
         return result
 
@@ -196,14 +241,21 @@ def _transform_agent_input(messages: list[dict[str, str]], agent_rules: dict[str
     rules = agent_rules.get("input", {})
     if not rules:
         return messages
+    any_rule, compiled = _compiled_text_rules(rules)
+    if not compiled:
+        return messages
     new_messages = []
+    changed = False
     for m in messages:
         if m.get("role") in ("system", "user", "assistant"):
-            content = _transform_text(m.get("content", ""), rules)
-            new_messages.append({**m, "content": content})
-        else:
-            new_messages.append(m)
-    return new_messages
+            original = m.get("content", "")
+            content = _apply_text_rules(original, any_rule, compiled)
+            if content is not original:
+                m = {**m, "content": content}
+                changed = True
+        new_messages.append(m)
+    # Hand back the caller's list when no message was rewritten.
+    return new_messages if changed else messages
 
 
 def _transform_agent_output(text: str, agent_rules: dict[str, Any]) -> str:
@@ -228,29 +280,71 @@ def _transform_tool_output(result: Any, tool_rules: dict[str, Any]):
 
 
 def _transform_value(value: Any, rules: dict[str, Any]):
+    any_rule, compiled = _compiled_text_rules(rules)
+    if not compiled:
+        return value
+    return _transform_compiled(value, any_rule, compiled)
+
+
+def _transform_compiled(value: Any, any_rule: re.Pattern[str] | None, compiled: tuple[tuple[Any, Any, int], ...]):
     if isinstance(value, str):
-        return _transform_text(value, rules)
+        return _apply_text_rules(value, any_rule, compiled)
     if isinstance(value, list):
-        return [_transform_value(v, rules) for v in value]
+        return [_transform_compiled(v, any_rule, compiled) for v in value]
     if isinstance(value, dict):
-        return {k: _transform_value(v, rules) for k, v in value.items()}
+        return {k: _transform_compiled(v, any_rule, compiled) for k, v in value.items()}
     return value
 
 
 def _transform_text(text: str, rules: dict[str, Any]) -> str:
-    replace_rules = rules.get("replace", [])
-    insert_before_rules = rules.get("insert_before", [])
-    insert_after_rules = rules.get("insert_after", [])
-    if not replace_rules and not insert_before_rules and not insert_after_rules:
+    any_rule, compiled = _compiled_text_rules(rules)
+    return _apply_text_rules(text, any_rule, compiled)
+
+
+def _apply_text_rules(text: str, any_rule: re.Pattern[str] | None, compiled: tuple[tuple[Any, Any, int], ...]) -> str:
+    if any_rule is not None and any_rule.search(text) is None:
+        # No rule matches the original text, so no pass could change it.
         return text
     out = text
-    for r in replace_rules:
+    for regex, repl, count in compiled:
+        out = regex.sub(repl, out, count=count)
+    return out
+
+
+@dataclass(frozen=True, slots=True)
+class _CompiledRules:
+    any_rule: re.Pattern[str] | None
+    subs: tuple[tuple[Any, Any, int], ...]
+    only: Any = None
+
+
+# Compiled forms of the rule dicts, keyed by id() so the user's config is never written to.
+# Each entry holds its rules dict too, which keeps that id from being reused.
+_COMPILED: dict[int, tuple[dict[str, Any], _CompiledRules]] = {}
+
+
+def _compiled_text_rules(rules: dict[str, Any]) -> tuple[re.Pattern[str] | None, tuple[tuple[Any, Any, int], ...]]:
+    compiled = _compiled_rules(rules)
+    return compiled.any_rule, compiled.subs
+
+
+def _compiled_rules(rules: dict[str, Any]) -> _CompiledRules:
+    # Rule dicts live for the whole run, so compile their patterns once.
+    entry = _COMPILED.get(id(rules))
+    if entry is None or entry[0] is not rules:
+        entry = _COMPILED[id(rules)] = (rules, _compile_text_rules(rules))
+    return entry[1]
+
+
+def _compile_text_rules(rules: dict[str, Any]) -> _CompiledRules:
+    compiled: list[tuple[Any, Any, int]] = []
+    for r in rules.get("replace", []):
         pattern = str(r.get("pattern", ""))
         repl = str(r.get("repl", ""))
         if not pattern:
             continue
-        out = re.sub(pattern, repl, out)
-    for r in insert_before_rules:
+        compiled.append((re.compile(pattern), repl, 0))
+    for r in rules.get("insert_before", []):
         pattern = str(r.get("pattern", ""))
         insert = str(r.get("insert", ""))
         count = int(r.get("count", 0)) if r.get("count") is not None else 0
@@ -258,13 +352,8 @@ def _transform_text(text: str, rules: dict[str, Any]) -> str:
             continue
 
         # Insert text right before each regex match.
-        out = re.sub(
-            pattern,
-            lambda m: f"{insert}{m.group(0)}",
-            out,
-            count=count if count > 0 else 0,
-        )
-    for r in insert_after_rules:
+        compiled.append((re.compile(pattern), lambda m, insert=insert: f"{insert}{m.group(0)}", max(count, 0)))
+    for r in rules.get("insert_after", []):
         pattern = str(r.get("pattern", ""))
         insert = str(r.get("insert", ""))
         count = int(r.get("count", 0)) if r.get("count") is not None else 0
@@ -272,13 +361,44 @@ def _transform_text(text: str, rules: dict[str, Any]) -> str:
             continue
 
         # Insert text right after each regex match.
-        out = re.sub(
-            pattern,
-            lambda m: f"{m.group(0)}{insert}",
-            out,
-            count=count if count > 0 else 0,
-        )
-    return out
+        compiled.append((re.compile(pattern), lambda m, insert=insert: f"{m.group(0)}{insert}", max(count, 0)))
+    return _CompiledRules(_any_rule_pattern(compiled), tuple(compiled), _only_set(rules.get("only")))
+
+
+def _only_set(only: Any) -> Any:
+    # A frozenset makes the per-call membership test O(1); unhashable entries keep the list.
+    if isinstance(only, list):
+        try:
+            return frozenset(only)
+        except TypeError:
+            pass
+    return only
+
+
+def _any_rule_pattern(compiled: list[tuple[Any, Any, int]]) -> re.Pattern[str] | None:
+    # Rules are applied in order, each to the previous rule's output, so they cannot be
+    # merged into one substitution. One alternation still answers "does anything match?".
+    if len(compiled) < 2:
+        return None
+    patterns = [regex.pattern for regex, _, _ in compiled]
+    # Numbered backreferences and conditionals would point at the wrong group once joined.
+    if any(_GROUP_REF_RE.search(pattern) for pattern in patterns):
+        return None
+    try:
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+    except re.error:
+        return None
+
+
+def _compile_rules(cfg: dict[str, Any]) -> None:
+    for section, keys in (("agent", ("input", "output", "system")), ("tools", ("input", "output"))):
+        section_rules = cfg.get(section)
+        if not isinstance(section_rules, dict):
+            continue
+        for key in keys:
+            rules = section_rules.get(key)
+            if isinstance(rules, dict) and rules:
+                _compiled_rules(rules)
 
 
 def _transform_prompt(prompt: Any, rules: dict[str, Any]) -> Any:
@@ -306,18 +426,26 @@ def _transform_prompt(prompt: Any, rules: dict[str, Any]) -> Any:
 
 
 def _tool_allowed(name: str, rules: dict[str, Any]) -> bool:
-    only = rules.get("only")
+    only = _compiled_rules(rules).only
     if not only:
         return True
     return name in only
 
 
 def _load_config(path: str) -> dict[str, Any]:
-    text = open(path, "r", encoding="utf-8").read()
-    if path.endswith(".json"):
-        return json.loads(text)
-    data = yaml.safe_load(text)
-    return data if isinstance(data, dict) else {}
+    with open(path, "rb") as fh:
+        data = fh.read()
+    is_json = path.endswith(".json")
+    if is_json or data.lstrip()[:1] == b"{":
+        # JSON (including a YAML file written as one JSON object) skips the YAML loader.
+        try:
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+        except ValueError:
+            if is_json:
+                # The stdlib parser also accepts NaN/Infinity and raises the usual error otherwise.
+                return json.loads(data)
+    loaded = yaml.load(data, Loader=_YAML_LOADER)
+    return loaded if isinstance(loaded, dict) else {}
 
 
 def _load_config_from_env_or_yaml(config_path: str | None) -> dict[str, Any] | None:
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from agent_scaffold import graph, main, tools
+from agent_scaffold.config import _config_fingerprint
+from env import virtual_email_env
+
+
+def _touch(path: Path, text: str) -> None:
+    path.write_text(text, encoding="utf-8")
+    stamp = time.time_ns() + 2_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+
+def _config_text(city: str, sender: str) -> str:
+    return (
+        "llm: {provider: mock, model: m}\n"
+        "agent: {name: a, system_prompt: hi}\n"
+        f"trip: {{city: {city}}}\n"
+        f"email: {{from_addr: {sender}}}\n"
+    )
+
+
+@pytest.fixture
+def config_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / "config.yaml"
+    path.write_text(_config_text("Lyon", "a@example.com"), encoding="utf-8")
+    monkeypatch.setenv("AGENT_CONFIG_PATH", str(path))
+    return path
+
+
+def test_tool_defaults_are_reused_until_the_config_changes(config_path: Path) -> None:
+    first = tools._load_trip_defaults()
+    assert first == {"city": "Lyon"}
+    assert tools._load_trip_defaults() is first
+    _touch(config_path, _config_text("Paris", "a@example.com"))
+    assert tools._load_trip_defaults() == {"city": "Paris"}
+
+
+def test_email_defaults_are_reused_until_the_config_changes(config_path: Path) -> None:
+    first = virtual_email_env._load_email_defaults()
+    assert first == {"from_addr": "a@example.com"}
+    assert virtual_email_env._load_email_defaults() is first
+    _touch(config_path, _config_text("Lyon", "b@example.com"))
+    assert virtual_email_env._load_email_defaults() == {"from_addr": "b@example.com"}
+
+
+def test_graph_is_rebuilt_only_when_the_config_changes(config_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    builds: list[Any] = []
+    monkeypatch.setattr(graph, "build_graph", lambda cfg: builds.append(cfg) or object())
+    main._build_graph_cached.cache_clear()
+    path = str(config_path)
+
+    first = main._build_graph_cached(path, _config_fingerprint(config_path), "")
+    assert main._build_graph_cached(path, _config_fingerprint(config_path), "") is first
+    assert len(builds) == 1
+
+    _touch(config_path, _config_text("Paris", "a@example.com"))
+    assert main._build_graph_cached(path, _config_fingerprint(config_path), "") is not first
+    assert len(builds) == 2
+    main._build_graph_cached.cache_clear()
+
+
+def test_email_state_resolves_against_the_run_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("AGENT_CONFIG_PATH", raising=False)
+    monkeypatch.delenv("AGENT_WORKSPACE_ROOT", raising=False)
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    with tools.run_directory(run_dir):
+        assert virtual_email_env._state_path() == run_dir.resolve() / "virtual_mailbox.json"
+    assert Path.cwd() != run_dir
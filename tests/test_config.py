@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from agent_scaffold import config
+from agent_scaffold.config import (
+    _build_config,
+    _config_fingerprint,
+    _load_prebuilt,
+    load_config,
+    load_config_header,
+    load_prebuilt_config_mapping,
+    prebuild_config,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_snapshots() -> Iterator[None]:
+    config._SNAPSHOTS.clear()
+    yield
+    config._SNAPSHOTS.clear()
+
+
+def _touch(path: Path, text: str) -> None:
+    # Push the mtime forward so the change is visible even on coarse-grained filesystems.
+    path.write_text(text, encoding="utf-8")
+    stamp = time.time_ns() + 2_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+
+def _write_config(tmp_path: Path) -> Path:
+    harness = tmp_path / "harness"
+    harness.mkdir()
+    (harness / "systemprompt.md").write_text("v1", encoding="utf-8")
+    (tmp_path / "skills" / "notes").mkdir(parents=True)
+    (tmp_path / "skills" / "notes" / "SKILL.md").write_text("first", encoding="utf-8")
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        "harness: harness\n"
+        "llm: {provider: mock, model: m}\n"
+        "agent: {name: a}\n"
+        "skills: {enabled: [notes, later]}\n"
+        "pro2guard: {model_path: model.json}\n",
+        encoding="utf-8",
+    )
+    return config_path
+
+
+def test_fingerprint_is_stable_without_changes(tmp_path: Path) -> None:
+    config_path = _write_config(tmp_path)
+    assert _config_fingerprint(config_path) == _config_fingerprint(config_path)
+
+
+def test_load_config_sees_harness_dir_outside_config_dir(tmp_path: Path) -> None:
+    config_path = _write_config(tmp_path)
+    assert load_config(config_path).agent.system_prompt == "v1"
+    _touch(tmp_path / "harness" / "systemprompt.md", "v2")
+    assert load_config(config_path).agent.system_prompt == "v2"
+
+
+def test_fingerprint_tracks_skill_files(tmp_path: Path) -> None:
+    config_path = _write_config(tmp_path)
+    before = _config_fingerprint(config_path)
+    _touch(tmp_path / "skills" / "notes" / "SKILL.md", "second")
+    after_edit = _config_fingerprint(config_path)
+    assert after_edit != before
+    (tmp_path / "skills" / "later").mkdir()
+    assert _config_fingerprint(config_path) != after_edit
+
+
+def test_fingerprint_tracks_pro2guard_model(tmp_path: Path) -> None:
+    config_path = _write_config(tmp_path)
+    before = _config_fingerprint(config_path)
+    _touch(tmp_path / "model.json", "{}")
+    assert _config_fingerprint(config_path) != before
+
+
+def test_cold_load_parses_each_yaml_file_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    config_path = _write_config(tmp_path).resolve()
+    (tmp_path / "harness" / "environment.yaml").write_text("trip: {city: Lyon}\n", encoding="utf-8")
+    parsed: list[Path] = []
+    real_load_yaml = config._load_yaml
+    monkeypatch.setattr(config, "_load_yaml", lambda path: parsed.append(path) or real_load_yaml(path))
+    cfg = load_config(config_path)
+    assert cfg.trip == {"city": "Lyon"}
+    assert sorted(parsed) == sorted([config_path, tmp_path / "harness" / "environment.yaml"])
+    assert load_config(config_path) is cfg
+    assert _config_fingerprint(config_path) == _config_fingerprint(config_path)
+    assert len(parsed) == 2
+
+
+def test_prebuilt_config_round_trips_through_json(tmp_path: Path) -> None:
+    config_path = _write_config(tmp_path).resolve()
+    cache_path = prebuild_config(config_path)
+    assert cache_path.suffix == ".json"
+    snapshot = _load_prebuilt(config_path)
+    assert snapshot is not None
+    assert snapshot.configs[""] == _build_config(config_path)
+    assert snapshot.raw["agent"]["name"] == "a"
+
+
+def test_prebuilt_warm_start_does_not_parse_yaml(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    config_path = _write_config(tmp_path).resolve()
+    prebuild_config(config_path)
+    expected = _build_config(config_path)
+
+    def fail(path: Path) -> None:
+        raise AssertionError(f"parsed {path}")
+
+    monkeypatch.setattr(config, "_load_yaml", fail)
+    monkeypatch.setenv("AGENT_CONTAINERIZED", "")
+    assert load_config(config_path) == expected
+    assert load_prebuilt_config_mapping(config_path)["llm"]["provider"] == "mock"
+
+
+def test_prebuilt_entry_is_ignored_when_stale_or_not_json(tmp_path: Path) -> None:
+    config_path = _write_config(tmp_path).resolve()
+    cache_path = prebuild_config(config_path)
+    _touch(tmp_path / "harness" / "systemprompt.md", "v2")
+    assert _load_prebuilt(config_path) is None
+    cache_path.write_bytes(pickle.dumps(("payload",)))
+    assert _load_prebuilt(config_path) is None
+
+
+def test_prebuilt_mapping_falls_back_to_yaml_for_a_planted_file(tmp_path: Path) -> None:
+    config_path = _write_config(tmp_path).resolve()
+    cache_path = prebuild_config(config_path)
+    assert load_prebuilt_config_mapping(config_path)["llm"]["provider"] == "mock"
+    config._SNAPSHOTS.clear()
+    cache_path.write_bytes(pickle.dumps({"llm": {"provider": "planted"}}))
+    assert load_prebuilt_config_mapping(config_path)["llm"]["provider"] == "mock"
+
+
+def test_prebuild_refuses_values_json_cannot_round_trip(tmp_path: Path) -> None:
+    config_path = _write_config(tmp_path).resolve()
+    (tmp_path / "harness" / "environment.yaml").write_text("trip: {date: 2024-05-01}\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="JSON-serializable"):
+        prebuild_config(config_path)
+    assert not (tmp_path / ".agent_cache").exists()
+
+
+def test_prebuild_removes_its_temp_file_when_the_write_fails(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    config_path = _write_config(tmp_path).resolve()
+
+    def fail_replace(self: Path, target: Path) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(Path, "replace", fail_replace)
+    with pytest.raises(OSError):
+        prebuild_config(config_path)
+    assert list((tmp_path / ".agent_cache").iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "llm: {provider: mock, model: m}\ngraph: {type: langchain_react}\n",
+        'llm: {provider: mock, model: m}\n"graph": {type: langchain_react}\n',
+        "defaults: &react {type: langchain_react}\nllm: {provider: mock, model: m}\ngraph: *react\n",
+        "base: &base {type: langchain_react}\nllm: {provider: mock, model: m}\ngraph:\n  <<: *base\n",
+        "? llm\n: {provider: mock, model: m}\ngraph: {type: langchain_react}\n",
+    ],
+)
+def test_config_header_agrees_with_full_parse(tmp_path: Path, text: str) -> None:
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(text, encoding="utf-8")
+    assert load_config_header(config_path) == {"provider": "mock", "graph_type": "langchain_react"}
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from agent_scaffold import tools
+
+_HIT = {"name": "Lyon", "latitude": 45.75, "longitude": 4.85, "country": "France", "timezone": "Europe/Paris"}
+
+
+@pytest.fixture
+def geocode_api(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[str]]:
+    calls: list[str] = []
+
+    def fake_get_json(url: str) -> dict[str, Any]:
+        calls.append(url)
+        return {"results": [dict(_HIT)]} if "Lyon" in url else {}
+
+    monkeypatch.setattr(tools, "_http_get_json", fake_get_json)
+    monkeypatch.delenv("AGENT_GEOCODE_CACHE", raising=False)
+    monkeypatch.setattr(tools, "_geocode_dirty", False)
+    tools._geocode_cache.cache_clear()
+    yield calls
+    tools._geocode_cache.cache_clear()
+
+
+def test_disk_cache_is_off_by_default(geocode_api: list[str], tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    assert tools._geocode("Lyon") == _HIT
+    assert tools._geocode("lyon ") == _HIT
+    assert len(geocode_api) == 1
+    assert not any(tmp_path.rglob("*"))
+
+
+def test_misses_are_not_cached(geocode_api: list[str]) -> None:
+    assert tools._geocode("Nowhere") is None
+    assert tools._geocode("Nowhere") is None
+    assert len(geocode_api) == 2
+
+
+def test_opt_in_disk_cache_keeps_the_full_payload(
+    geocode_api: list[str], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache_path = tmp_path / "geocode.json"
+    monkeypatch.setenv("AGENT_GEOCODE_CACHE", str(cache_path))
+    assert tools._geocode_first(["Lyon"]) == _HIT
+    assert tools._geocode_first(["Nowhere"]) is None
+    assert json.loads(cache_path.read_text(encoding="utf-8")) == {"lyon": _HIT}
+
+    tools._geocode_cache.cache_clear()
+    assert tools._geocode("Lyon") == _HIT
+    assert len(geocode_api) == 2
+
+
+def test_disk_cache_is_written_once_per_batch(
+    geocode_api: list[str], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache_path = tmp_path / "geocode.json"
+    monkeypatch.setenv("AGENT_GEOCODE_CACHE", str(cache_path))
+    writes: list[str] = []
+    real_replace = tools.os.replace
+
+    def counting_replace(src: Any, dst: Any) -> None:
+        writes.append(str(dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(tools.os, "replace", counting_replace)
+    assert tools._geocode("Lyon") == _HIT
+    assert not cache_path.exists()
+    assert tools._geocode_first(["Lyon, France", "Lyon"]) == _HIT
+    assert writes == [str(cache_path)]
+    assert tools._geocode_first(["Lyon"]) == _HIT
+    assert len(writes) == 1
+
+
+def test_memory_cache_evicts_the_least_recently_used_entry(geocode_api: list[str]) -> None:
+    for index in range(tools._GEOCODE_CACHE_SIZE):
+        tools._store_geocode(f"city {index}", {"latitude": index, "longitude": index})
+    assert tools._geocode("City 0") == {"latitude": 0, "longitude": 0}
+    tools._store_geocode("one more", {"latitude": 0.5, "longitude": 0.5})
+    cache = tools._geocode_cache()
+    assert len(cache) == tools._GEOCODE_CACHE_SIZE
+    assert "city 0" in cache
+    assert "city 1" not in cache
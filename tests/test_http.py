@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import gzip
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+
+from agent_scaffold.tools import _http_fetch, _http_opener
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body_for(self, text: bytes, status: int = 200) -> None:
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            self._send(status, gzip.compress(text), {"Content-Encoding": "gzip"})
+        else:
+            self._send(status, text)
+
+    def do_GET(self) -> None:
+        if self.path == "/port":
+            self._send(200, str(self.client_address[1]).encode())
+        elif self.path == "/drop":
+            # Answer, then hang up without announcing it, like a server timing out an idle socket.
+            self._send(200, str(self.client_address[1]).encode())
+            self.close_connection = True
+        elif self.path == "/big":
+            self._send(200, b"x" * 200_000)
+        elif self.path == "/plain":
+            self._send(200, b"hello", {"X-Test": "1"})
+        elif self.path == "/gzip":
+            self._body_for(b"compressed " * 100)
+        elif self.path == "/redirect":
+            self._send(302, b"", {"Location": "/plain"})
+        elif self.path == "/missing":
+            self._body_for(b'{"message": "Not Found"}', status=404)
+        else:
+            self._send(500, b"boom")
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = self.rfile.read(length)
+        if self.path == "/echo":
+            self._send(200, payload)
+        elif self.path == "/temporary":
+            self._send(307, b"", {"Location": "/echo"})
+        else:
+            self._send(404, b"")
+
+
+@pytest.fixture(autouse=True)
+def _no_proxies(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    for name in ("http_proxy", "https_proxy", "HTTP_PROXY", "HTTPS_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    _http_opener.cache_clear()
+    yield
+    _http_opener.cache_clear()
+
+
+@pytest.fixture(scope="module")
+def base_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_returns_body_and_headers(base_url: str) -> None:
+    body, headers = _http_fetch(base_url + "/plain")
+    assert body == b"hello"
+    assert headers["X-Test"] == "1"
+
+
+def test_repeated_fetches_reuse_the_opener(base_url: str) -> None:
+    assert [_http_fetch(base_url + "/plain")[0] for _ in range(3)] == [b"hello"] * 3
+
+
+def test_gzip_bodies_are_decoded_and_capped(base_url: str) -> None:
+    assert _http_fetch(base_url + "/gzip")[0] == b"compressed " * 100
+    assert _http_fetch(base_url + "/gzip", max_bytes=10)[0] == b"compressed"
+
+
+def test_redirects_are_followed(base_url: str) -> None:
+    assert _http_fetch(base_url + "/redirect")[0] == b"hello"
+
+
+def test_post_does_not_follow_temporary_redirect(base_url: str) -> None:
+    assert _http_fetch(base_url + "/echo", method="POST", data=b"x=1")[0] == b"x=1"
+    with pytest.raises(urllib.error.HTTPError) as info:
+        _http_fetch(base_url + "/temporary", method="POST", data=b"x=1")
+    assert info.value.code == 307
+
+
+def test_error_bodies_are_decoded(base_url: str) -> None:
+    with pytest.raises(urllib.error.HTTPError) as info:
+        _http_fetch(base_url + "/missing")
+    assert info.value.code == 404
+    assert info.value.read() == b'{"message": "Not Found"}'
+    with pytest.raises(urllib.error.HTTPError) as info:
+        _http_fetch(base_url + "/other")
+    assert info.value.read() == b"boom"
+
+
+def _port(base_url: str, path: str = "/port", **kwargs: object) -> int:
+    return int(_http_fetch(base_url + path, **kwargs)[0])
+
+
+def test_connections_are_kept_alive_between_requests(base_url: str) -> None:
+    first = _port(base_url)
+    assert _http_fetch(base_url + "/gzip")[0] == b"compressed " * 100
+    assert _port(base_url) == first
+
+
+def test_partially_read_bodies_do_not_leak_into_the_next_request(base_url: str) -> None:
+    _port(base_url)
+    assert _http_fetch(base_url + "/big", max_bytes=10)[0] == b"x" * 10
+    assert _http_fetch(base_url + "/plain")[0] == b"hello"
+    with pytest.raises(urllib.error.HTTPError):
+        _http_fetch(base_url + "/other")
+    assert _http_fetch(base_url + "/plain")[0] == b"hello"
+
+
+def test_stale_connections_are_replaced(base_url: str) -> None:
+    dropped = _port(base_url, "/drop")
+    assert _port(base_url) != dropped
+
+
+def test_writes_use_a_fresh_connection(base_url: str) -> None:
+    first = _port(base_url)
+    assert _http_fetch(base_url + "/echo", method="POST", data=b"x=1")[0] == b"x=1"
+    assert _port(base_url) != first
+
+
+def test_proxied_requests_use_the_default_opener(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("http_proxy", "http://proxy.invalid:3128")
+    handlers = [type(handler).__name__ for handler in _http_opener().handlers]
+    assert "_KeepAliveHTTPHandler" not in handlers
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+import pytest
+
+pytest.importorskip("aspectlib")
+
+import infect  # noqa: E402
+
+
+def _config() -> dict[str, Any]:
+    return {
+        "enabled": True,
+        "agent": {"input": {"replace": [{"pattern": "foo", "repl": "bar"}]}},
+        "tools": {
+            "output": {
+                "insert_after": [{"pattern": "$", "insert": " [x]"}],
+                "only": ["search"],
+            }
+        },
+    }
+
+
+def test_compiled_patterns_are_not_stored_in_the_config() -> None:
+    cfg = _config()
+    before = copy.deepcopy(cfg["agent"])
+    infect._compile_rules(cfg)
+    assert infect._transform_text("foo", cfg["agent"]["input"]) == "bar"
+    assert cfg["agent"] == before
+
+
+def test_compiled_rules_follow_the_rules_dict() -> None:
+    rules = {"replace": [{"pattern": "a", "repl": "b"}]}
+    assert infect._transform_text("aa", rules) == "bb"
+    other = {"replace": [{"pattern": "a", "repl": "c"}]}
+    assert infect._transform_text("aa", other) == "cc"
+    assert infect._transform_text("aa", rules) == "bb"
+
+
+def test_only_lists_are_not_replaced_in_the_config() -> None:
+    cfg = _config()
+    before = copy.deepcopy(cfg)
+    infect._compile_rules(cfg)
+    output_rules = cfg["tools"]["output"]
+    assert infect._tool_allowed("search", output_rules)
+    assert not infect._tool_allowed("email_send", output_rules)
+    assert infect._tool_allowed("anything", {"only": []})
+    assert cfg == before
+    assert type(output_rules["only"]) is list
+
+
+def test_apply_skips_only_configs_it_already_applied(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    weaves: list[Any] = []
+    monkeypatch.setattr(infect, "_APPLIED", set())
+    monkeypatch.setattr(infect, "_resolve_module", lambda *names: None)
+    monkeypatch.setattr(infect, "_uses_react_graph", lambda config_path: False)
+    monkeypatch.setattr(infect, "_weave_first_available_symbol", lambda names, aspect, **options: weaves.append(names))
+    monkeypatch.setattr(infect, "_tool_loader_aspect", lambda rules: None)
+    first = tmp_path / "first.json"
+    first.write_text('{"enabled": true, "tools": {}}', encoding="utf-8")
+    second = tmp_path / "second.json"
+    second.write_text('{"enabled": true, "tools": {"input": {"only": ["a"]}}}', encoding="utf-8")
+
+    monkeypatch.setenv("INFECT_CONFIG", str(first))
+    infect.apply()
+    infect.apply()
+    assert "already applied" in capsys.readouterr().out
+    assert len(weaves) == 2
+
+    monkeypatch.setenv("INFECT_CONFIG", str(second))
+    infect.apply()
+    assert len(weaves) == 4
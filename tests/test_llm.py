@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+import pytest
+
+from agent_scaffold import llm
+from agent_scaffold.config import LLMConfig
+from agent_scaffold.llm import LLMAdapter, LLMResponse
+from agent_scaffold.nodes import _update_usage_totals
+
+_RAW = SimpleNamespace(usage_metadata={"input_tokens": 3, "output_tokens": 4, "total_tokens": 7})
+
+
+def test_usage_is_extracted_lazily_from_raw() -> None:
+    usage = LLMResponse(content="hi", raw=_RAW).usage
+    assert usage is not None
+    assert (usage["prompt_tokens"], usage["completion_tokens"], usage["total_tokens"]) == (3, 4, 7)
+    assert LLMResponse(content="hi").usage is None
+
+
+def test_explicit_usage_takes_precedence() -> None:
+    explicit = {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+    assert LLMResponse(content="hi", usage=explicit, raw=_RAW).usage == explicit
+    assert LLMResponse("hi", explicit) == LLMResponse(content="hi", usage=explicit)
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def invoke(self, messages: list[Any]) -> Any:
+        self.calls += 1
+        return SimpleNamespace(content=f"answer {self.calls}", usage_metadata=_RAW.usage_metadata)
+
+
+@pytest.fixture
+def fake_client() -> Iterator[_FakeClient]:
+    llm._RESPONSE_CACHE.clear()
+    yield _FakeClient()
+    llm._RESPONSE_CACHE.clear()
+
+
+def _adapter(client: _FakeClient, temperature: float = 0) -> LLMAdapter:
+    adapter = LLMAdapter(LLMConfig(provider="openai", model="m", temperature=temperature, cache_responses=True))
+    adapter._client = client
+    adapter._role_to_cls = {"user": lambda content: content}
+    return adapter
+
+
+def _ask(adapter: LLMAdapter, text: str) -> LLMResponse:
+    return adapter.chat([{"role": "user", "content": text}])
+
+
+def test_greedy_responses_are_replayed_and_flagged(fake_client: _FakeClient) -> None:
+    adapter = _adapter(fake_client)
+    first = _ask(adapter, "hi")
+    second = _ask(adapter, "hi")
+    assert fake_client.calls == 1
+    assert (first.cached, second.cached) == (False, True)
+    assert second.content == first.content
+    assert second.usage is None
+
+
+def test_sampled_responses_bypass_the_cache(fake_client: _FakeClient) -> None:
+    adapter = _adapter(fake_client, temperature=0.7)
+    assert _ask(adapter, "hi").content == "answer 1"
+    assert _ask(adapter, "hi").content == "answer 2"
+    assert not llm._RESPONSE_CACHE
+
+
+def test_cache_evicts_the_least_recently_used_response(fake_client: _FakeClient) -> None:
+    adapter = _adapter(fake_client)
+    for index in range(llm._RESPONSE_CACHE_SIZE):
+        _ask(adapter, f"q{index}")
+    assert _ask(adapter, "q0").cached
+    _ask(adapter, "one more")
+    assert len(llm._RESPONSE_CACHE) == llm._RESPONSE_CACHE_SIZE
+    assert _ask(adapter, "q0").cached
+    calls = fake_client.calls
+    assert not _ask(adapter, "q1").cached
+    assert fake_client.calls == calls + 1
+
+
+def test_cache_hits_are_not_counted_as_api_calls() -> None:
+    state: dict[str, Any] = {}
+    usage = {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7}
+    _update_usage_totals(state, usage)
+    _update_usage_totals(state, usage, cached=True)
+    stats = state["trace_stats"]
+    assert (stats["api_calls"], stats["cache_hits"], stats["total_tokens"]) == (1, 1, 7)
+
+
+def test_token_estimates_do_not_keep_message_text_alive() -> None:
+    llm._TOKEN_COUNTS.clear()
+    text = "x" * 400
+    assert llm._estimate_tokens("unknown-model", text) == llm._estimate_tokens("unknown-model", "x" * 400)
+    assert len(llm._TOKEN_COUNTS) == 1
+    assert all(not isinstance(part, str) or part == "unknown-model" for key in llm._TOKEN_COUNTS for part in key)
+    llm._TOKEN_COUNTS.clear()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import ast
+import operator as op
+import re
+import urllib.parse
+
+import pytest
+
+from agent_scaffold.tools import _parse_github_repo_ref, calculator
+
+
+def _reference_parse_github_repo_ref(value: str) -> tuple[str | None, str | None]:
+    # The original urlparse-based parser, kept verbatim as the parity oracle.
+    raw = (value or "").strip()
+    if not raw:
+        return None, None
+    if raw.startswith("http://") or raw.startswith("https://"):
+        parsed = urllib.parse.urlparse(raw)
+        path = parsed.path.strip("/")
+    else:
+        path = raw.strip("/")
+    parts = [p for p in path.split("/") if p]
+    if len(parts) >= 2:
+        owner = parts[0]
+        repo = parts[1]
+        if repo.endswith(".git"):
+            repo = repo[:-4]
+        return owner, repo
+    return None, None
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "",
+        "owner",
+        "owner/repo",
+        "/owner/repo/",
+        "owner//repo",
+        "owner/repo.git",
+        "https://github.com/owner/repo",
+        "https://github.com/owner/repo.git/tree/main",
+        "http://github.com//owner//repo",
+        "https://github.com/owner/repo?tab=readme#top",
+        "https://github.com?x=/a/b",
+        "https://#fwww.github.com/https://rwww.github.com/",
+        "https://github.com/owner;params/repo",
+        "github.com/owner/repo",
+    ],
+)
+def test_parse_github_repo_ref_matches_reference(value: str) -> None:
+    assert _parse_github_repo_ref(value) == _reference_parse_github_repo_ref(value)
+
+
+_REFERENCE_OPS = {
+    ast.Add: op.add,
+    ast.Sub: op.sub,
+    ast.Mult: op.mul,
+    ast.Div: op.truediv,
+    ast.FloorDiv: op.floordiv,
+    ast.Mod: op.mod,
+    ast.Pow: op.pow,
+    ast.USub: op.neg,
+}
+
+
+def _reference_eval(node: ast.AST) -> float:
+    # The original ast-walking calculator, kept as the parity oracle.
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _REFERENCE_OPS:
+        return _REFERENCE_OPS[type(node.op)](_reference_eval(node.left), _reference_eval(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _REFERENCE_OPS:
+        return _REFERENCE_OPS[type(node.op)](_reference_eval(node.operand))
+    raise ValueError("Unsupported expression")
+
+
+def _reference_calculator(expression: str) -> str:
+    cleaned = re.sub(r"[^0-9\.\+\-\*\/\%\(\)\s]", "", expression).strip()
+    if not cleaned:
+        raise ValueError("Empty expression")
+    return str(_reference_eval(ast.parse(cleaned, mode="eval").body))
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "1+2",
+        "2*3+4",
+        "2+3*4",
+        "(2+3)*4",
+        "7/2",
+        "7//2",
+        "-7//2",
+        "7%3",
+        "-7%3",
+        "2**3**2",
+        "-2**2",
+        "(-2)**2",
+        "2**-1",
+        "--3",
+        "1.5*2",
+        ".5+1",
+        "3.",
+        "10 - 2 - 3",
+        "2*(3+(4-1))/3",
+        "what is 12 * 4?",
+        "1e3",
+        "0.1+0.2",
+        "100 // 7 % 3",
+    ],
+)
+def test_calculator_matches_reference(expression: str) -> None:
+    assert calculator(expression) == _reference_calculator(expression)
+
+
+@pytest.mark.parametrize("expression", ["", "abc", "1+", "(1+2", "1/0", "2 3", "+3", "1..2", "()"])
+def test_calculator_rejects_what_the_reference_rejects(expression: str) -> None:
+    with pytest.raises(Exception):
+        _reference_calculator(expression)
+    with pytest.raises(Exception):
+        calculator(expression)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from agent_scaffold import tools
+
+
+def test_html_fallback_is_only_fetched_when_instant_answer_is_empty(monkeypatch: pytest.MonkeyPatch) -> None:
+    fetched: list[str] = []
+    answer: dict[str, Any] = {"Results": [{"Text": "Python", "FirstURL": "https://python.org"}]}
+    monkeypatch.setattr(tools, "_http_get_json", lambda url: answer)
+    monkeypatch.setattr(tools, "open_url", lambda url, max_chars=0: fetched.append(url) or "")
+
+    assert tools._duckduckgo_search_once("python") == [
+        {"title": "Python", "url": "https://python.org", "snippet": "Python"}
+    ]
+    assert fetched == []
+
+    answer = {}
+    assert tools._duckduckgo_search_once("python") == []
+    assert fetched == ["https://duckduckgo.com/html/?q=python"]